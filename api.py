@@ -1,57 +1,316 @@
 # api.py
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import random
 import time
 import threading
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, Iterable, Tuple
 from settings import Config
+from enums import CacheState
+from price_cache import PriceCache, cache_key
+from price_snapshot import PriceSnapshot, SNAPSHOT_QUERY
+from metrics import metrics
 import logging
 
-class TarkovAPI:
+ITEM_FIELDS = """
+    name
+    shortName
+    avg24hPrice
+    basePrice
+    wikiLink
+"""
+
+def build_items_query(names: List[str]) -> Tuple[str, dict]:
+    """Builds one GraphQL document with an aliased itemsByName field per name.
+
+    Returns:
+        tuple: The query string and its variables; alias i<n> answers names[n].
+    """
+    params = ", ".join(f"$n{i}: String!" for i in range(len(names)))
+    fields = "\n".join(f"  i{i}: itemsByName(name: $n{i}) {{{ITEM_FIELDS}  }}" for i in range(len(names)))
+    query = f"query itemsByNames({params}) {{\n{fields}\n}}"
+    variables = {f"n{i}": name for i, name in enumerate(names)}
+    return query, variables
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, in bursts of up to burst."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available; a rate of 0 or less never blocks."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+OnItem = Callable[[str, Optional[List[dict]]], None]
+
+class _Call:
+    """One in-flight fetch of an item name that other threads can wait for."""
+    __slots__ = ("done", "result")
+
     def __init__(self):
-        self.cache = {}
+        self.done = threading.Event()
+        self.result: Optional[List[dict]] = None
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(Config.API_BACKOFF_MAX, Config.API_BACKOFF_BASE * 2 ** attempt))
+
+class TarkovAPI:
+    """Price lookups against the tarkov.dev GraphQL API.
+
+    Requests share one keep-alive session, are paced by a token bucket and run at most
+    Config.API_MAX_CONCURRENCY at a time. Concurrent fetches of the same name (by
+    cache_key) are coalesced: the first caller fetches it and the others wait for
+    its result.
+    """
+
+    def __init__(self, api_url: str = Config.API_URL, batch_size: int = Config.API_BATCH_SIZE,
+                 cache: Optional[PriceCache] = None,
+                 stale_while_revalidate: bool = Config.CACHE_STALE_WHILE_REVALIDATE,
+                 rate_limit: float = Config.API_RATE_LIMIT, max_concurrency: int = Config.API_MAX_CONCURRENCY):
+        self.api_url = api_url
+        self.batch_size = max(1, batch_size)
+        self.cache = cache if cache is not None else PriceCache()
+        self.stale_while_revalidate = stale_while_revalidate
         self.lock = threading.Lock()
+        self.refreshing = set()
+        self.refreshes = 0
+        self.inflight: Dict[str, _Call] = {}
+        self.coalesced = 0
+        self.snapshot: Optional[PriceSnapshot] = None
+        self.max_concurrency = max(1, max_concurrency)
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.rate_limiter = TokenBucket(rate_limit, Config.API_RATE_BURST)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def _filter(item_name: str, item_data: List[dict]) -> List[dict]:
+        if item_name.lower() == "diary":
+            item_data = [item for item in item_data if "slim diary" not in item["name"].lower()]
+        return item_data
+
+    def _store(self, item_name: str, item_data: List[dict]) -> List[dict]:
+        item_data = self._filter(item_name, item_data)
+        self.cache.put(item_name, item_data)
+        return item_data
 
+    def enable_snapshot(self, snapshot: Optional[PriceSnapshot] = None):
+        """Answers lookups from a full-catalogue snapshot, refreshed in the background.
+
+        Until a snapshot has been loaded or downloaded, lookups keep using the cache and API.
+        """
+        if self.snapshot is not None:
+            return
+        self.snapshot = snapshot or PriceSnapshot()
+        self.snapshot.start(self.download_all_items)
+
+    def disable_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.stop()
+            self.snapshot = None
+
+    def download_all_items(self) -> Optional[List[dict]]:
+        """Downloads every item with its prices in one query."""
+        logging.info("Downloading full price snapshot")
+        data = self._post(SNAPSHOT_QUERY, {}, description="price snapshot")
+        return data.get("items") if data else None
+
+    @metrics.timed("api.get_item_data")
     def get_item_data(self, item_name: str) -> Optional[List[dict]]:
         """Fetches item data from the API, using a cache."""
         item_name = item_name.strip()
+        return self.get_items_data([item_name]).get(item_name)
+
+    @metrics.timed("api.get_items_data")
+    def get_items_data(self, item_names: Iterable[str],
+                       on_item: Optional[OnItem] = None) -> Dict[str, Optional[List[dict]]]:
+        """Fetches data for many items, answering cache hits locally and all misses in batched requests.
+
+        Expired entries are returned as-is and refreshed on a background thread when
+        stale-while-revalidate is enabled; otherwise they are fetched like misses.
+        With a loaded price snapshot, every name is answered from memory instead.
+
+        on_item, if given, is called with each stripped name and its data as soon as
+        that name is answered: cache hits first, then misses as their request returns.
+        It runs on whichever thread answered the name.
+
+        Returns:
+            dict: Item data per stripped name; None for names whose request failed.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.loaded:
+            results = {}
+            for item_name in item_names:
+                item_name = item_name.strip()
+                if item_name not in results:
+                    results[item_name] = self._filter(item_name, snapshot.lookup(item_name))
+                    if on_item is not None:
+                        on_item(item_name, results[item_name])
+            return results
+
+        results: Dict[str, Optional[List[dict]]] = {}
+        misses = []
+        stale = []
+        for item_name in item_names:
+            item_name = item_name.strip()
+            if item_name in results:
+                continue
+            state, cached_data = self.cache.get(item_name)
+            if state == CacheState.FRESH:
+                results[item_name] = cached_data
+            elif state == CacheState.STALE and self.stale_while_revalidate:
+                results[item_name] = cached_data
+                stale.append(item_name)
+            else:
+                results[item_name] = None
+                misses.append(item_name)
+                continue
+            if on_item is not None:
+                on_item(item_name, cached_data)
+
+        metrics.count("api.cache.fresh", len(results) - len(stale) - len(misses))
+        metrics.count("api.cache.stale", len(stale))
+        metrics.count("api.cache.miss", len(misses))
+        if stale:
+            self._refresh_in_background(stale)
+        results.update(self._fetch(misses, on_item))
+        return results
+
+    def _refresh_in_background(self, item_names: List[str]):
         with self.lock:
-            if item_name in self.cache:
-                cached_data, timestamp = self.cache[item_name]
-                if time.time() - timestamp < Config.CACHE_TTL:
-                    logging.debug(f"Cache hit for {item_name}")
-                    return cached_data
-                else:
-                    logging.debug(f"Cache expired for {item_name}")
-                    del self.cache[item_name]
-
-        logging.info(f"Fetching data from API for {item_name}")
-        query = """
-        query itemsByName($name: String!) {
-          itemsByName(name: $name) {
-            name
-            shortName
-            avg24hPrice
-            basePrice
-            wikiLink
-          }
-        }
+            names = [name for name in item_names if cache_key(name) not in self.refreshing]
+            self.refreshing.update(cache_key(name) for name in names)
+        if not names:
+            return
+
+        def refresh():
+            try:
+                self._fetch(names)
+            finally:
+                with self.lock:
+                    self.refreshing.difference_update(cache_key(name) for name in names)
+                    self.refreshes += len(names)
+
+        logging.info(f"Refreshing {len(names)} stale cache entries in the background")
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _fetch(self, item_names: List[str], on_item: Optional[OnItem] = None) -> Dict[str, List[dict]]:
+        """Fetches and caches the given names, Config.API_BATCH_SIZE per aliased request.
+
+        Names another thread is already fetching are not requested again; their
+        result is waited for instead. Chunks are requested concurrently, and on_item
+        hears about each name as its chunk returns.
         """
-        variables = {"name": item_name}
+        owned: List[Tuple[str, _Call]] = []
+        waiting: List[Tuple[str, _Call]] = []
+        with self.lock:
+            for item_name in item_names:
+                key = cache_key(item_name)
+                call = self.inflight.get(key)
+                if call is None:
+                    call = self.inflight[key] = _Call()
+                    owned.append((item_name, call))
+                else:
+                    waiting.append((item_name, call))
+            self.coalesced += len(waiting)
+        metrics.count("api.coalesced", len(waiting))
+
+        try:
+            chunks = [owned[start:start + self.batch_size] for start in range(0, len(owned), self.batch_size)]
+            if len(chunks) > 1:
+                with ThreadPoolExecutor(min(len(chunks), self.max_concurrency), thread_name_prefix="api") as pool:
+                    list(pool.map(lambda chunk: self._fetch_chunk(chunk, on_item), chunks))
+            elif chunks:
+                self._fetch_chunk(chunks[0], on_item)
+        finally:
+            with self.lock:
+                for item_name, call in owned:
+                    del self.inflight[cache_key(item_name)]
+            for _, call in owned:
+                call.done.set()
+
+        results = {}
+        for item_name, call in owned:
+            if call.result is not None:
+                results[item_name] = call.result
+        for item_name, call in waiting:
+            call.done.wait()
+            if call.result is not None:
+                results[item_name] = call.result
+            if on_item is not None:
+                on_item(item_name, call.result)
+        return results
 
+    def _fetch_chunk(self, chunk: List[Tuple[str, _Call]], on_item: Optional[OnItem] = None):
+        names = [item_name for item_name, _ in chunk]
+        logging.info(f"Fetching data from API for {len(names)} items: {', '.join(names)}")
+        data = self._post(*build_items_query(names), description=f"{len(names)} items") or {}
+        for i, (item_name, call) in enumerate(chunk):
+            item_data = data.get(f"i{i}")
+            if item_data is not None:
+                call.result = self._store(item_name, item_data)
+            elif data:
+                logging.warning(f"API returned no field for {item_name}")
+            if on_item is not None:
+                on_item(item_name, call.result)
+
+    def cache_stats(self) -> dict:
+        """Returns the price cache counters plus the number of background refreshes."""
+        stats = self.cache.stats()
+        with self.lock:
+            stats["refreshes"] = self.refreshes
+            stats["refreshing"] = len(self.refreshing)
+            stats["coalesced"] = self.coalesced
+        return stats
+
+    def _post(self, query: str, variables: dict, description: str) -> Optional[dict]:
+        """Posts a GraphQL query with retries and returns its data object, or None on failure.
+
+        Failed attempts are retried after a jittered exponential backoff, or after the
+        server's Retry-After when it answers 429/503 with one.
+        """
         for attempt in range(Config.MAX_RETRIES):
+            if attempt:
+                time.sleep(delay)
+            delay = backoff_delay(attempt)
+            self.rate_limiter.acquire()
+            metrics.count("api.requests")
             try:
-                response = requests.post(Config.API_URL, json={'query': query, 'variables': variables})
+                with self.slots, metrics.span("api.request"):
+                    response = self.session.post(self.api_url, json={'query': query, 'variables': variables},
+                                                 timeout=Config.API_TIMEOUT)
+                if response.status_code in (429, 503) and response.headers.get("Retry-After", "").isdigit():
+                    delay = min(Config.API_BACKOFF_MAX, float(response.headers["Retry-After"]))
                 response.raise_for_status()
-                data = response.json()
-                item_data = data.get('data', {}).get('itemsByName', [])
-                with self.lock:
-                    if item_name.lower() == "diary":
-                        item_data = [item for item in item_data if "slim diary" not in item["name"].lower()]
-                    self.cache[item_name] = (item_data, time.time())
-                time.sleep(Config.REQUEST_DELAY)
-                return item_data
+                payload = response.json()
+                if payload.get('errors'):
+                    logging.warning(f"API reported errors for {description}: {payload['errors']}")
+                return payload.get('data') or {}
             except Exception as e:
-                logging.error(f"API error for {item_name} (Attempt {attempt + 1}/{Config.MAX_RETRIES}): {e}", exc_info=True)
-                if attempt + 1 == Config.MAX_RETRIES:
-                    return None
\ No newline at end of file
+                metrics.count("api.errors")
+                logging.error(f"API error for {description} (Attempt {attempt + 1}/{Config.MAX_RETRIES}): {e}", exc_info=True)
+        return None
@@ -0,0 +1,149 @@
+# batch.py
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+from typing import Iterator, List, Optional
+from settings import AppSettings, Config, load_autocorrect_rules
+from catalogue import load_item_index
+from correction import TermCorrector
+from api import TarkovAPI
+from ocr_service import OCRService
+from history import HistoryStore
+from utils import hash_file
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
+OUTPUT_FIELDS = ["image", "item", "count", "name", "avg24hPrice", "cells"]
+
+def make_corrector(use_item_corrections: bool) -> TermCorrector:
+    """Builds the term corrector used by the headless pipelines."""
+    return TermCorrector(load_autocorrect_rules(), load_item_index(), use_item_corrections)
+
+def correct_ocr_result(path: str, future, corrector: TermCorrector) -> dict:
+    """Turns a finished OCRService future into an image result with corrected lines and counts."""
+    try:
+        results = future.result()
+        lines, counts = corrector.correct_results(results)
+        cells = corrector.item_cells(results, lines)
+        error = None
+    except Exception as e:
+        logging.error(f"Error processing {path}: {e}")
+        lines, counts, cells, error = [], {}, {}, str(e)
+    return {"image": path, "lines": lines, "counts": counts, "cells": cells, "error": error,
+            "seconds": future.ocr_seconds or 0.0, "timings": {"ocr": future.ocr_seconds or 0.0, **future.timings}}
+
+def find_images(directory: str) -> List[str]:
+    """Lists the image files under directory, recursively, in a stable order."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def result_rows(result: dict, items_data: dict) -> Iterator[dict]:
+    """Flattens one image result into item/count/price rows, one per API match.
+
+    In grid mode, cells lists where each item sits on the grid (see TermCorrector.cell_labels);
+    otherwise it is empty.
+    """
+    cells = result.get("cells") or {}
+    for item_name, count in result["counts"].items():
+        matches = items_data.get(item_name.strip())
+        labels = TermCorrector.cell_labels(cells.get(item_name))
+        if not matches:
+            yield {"image": result["image"], "item": item_name, "count": count, "name": None, "avg24hPrice": None,
+                   "cells": labels}
+            continue
+        for item in matches:
+            yield {"image": result["image"], "item": item_name, "count": count,
+                   "name": item["name"], "avg24hPrice": item["avg24hPrice"], "cells": labels}
+
+class RowWriter:
+    """Streams rows to JSONL or CSV, flushing after every image."""
+
+    def __init__(self, stream, fmt: str, header: bool = True):
+        self.stream = stream
+        self.fmt = fmt
+        self.csv_writer = None
+        if fmt == "csv":
+            self.csv_writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS)
+            if header:
+                self.csv_writer.writeheader()
+
+    def write(self, rows: Iterator[dict]):
+        for row in rows:
+            if self.csv_writer:
+                self.csv_writer.writerow(row)
+            else:
+                self.stream.write(json.dumps(row) + "\n")
+        self.stream.flush()
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def run_batch(directory: str, output: str = "-", fmt: str = "jsonl", workers: int = Config.BATCH_WORKERS,
+              use_gpu: Optional[bool] = None) -> dict:
+    """Prices every screenshot under directory and streams the rows to output ('-' for stdout).
+
+    Returns:
+        dict: The throughput summary that is also printed to stderr.
+    """
+    settings = AppSettings()
+    use_gpu = settings.ocr_use_gpu if use_gpu is None else use_gpu
+    paths = find_images(directory)
+    logging.info(f"Batch run over {len(paths)} images in {directory} with {workers} workers")
+
+    api = TarkovAPI()
+    if settings.use_price_snapshot:
+        api.enable_snapshot()
+    corrector = make_corrector(settings.use_item_corrections)
+    history = HistoryStore(kind="batch") if settings.history_enabled else None
+
+    latencies = []
+    errors = 0
+    stream = sys.stdout if output == "-" else open(output, "w", newline="", encoding="utf-8")
+    start = time.perf_counter()
+    service = OCRService.from_settings(settings, use_gpu, workers=workers).start()
+    try:
+        writer = RowWriter(stream, fmt)
+        futures = {service.submit(path, settings.ocr_grid_mode, refine=settings.ocr_refine): path
+                   for path in paths}
+        for future in as_completed(futures):
+            result = correct_ocr_result(futures[future], future, corrector)
+            price_start = time.perf_counter()
+            items_data = api.get_items_data(result["counts"].keys()) if result["counts"] else {}
+            latencies.append(result["seconds"] + time.perf_counter() - price_start)
+            if result["error"]:
+                errors += 1
+            elif history is not None:
+                history.record(hash_file(result["image"]), result["image"], result["counts"], items_data,
+                               {**result["timings"], "prices": time.perf_counter() - price_start})
+            writer.write(result_rows(result, items_data))
+    finally:
+        service.shutdown()
+        if history is not None:
+            history.close()
+        if stream is not sys.stdout:
+            stream.close()
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    summary = {
+        "images": len(paths),
+        "errors": errors,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "images_per_second": round(len(paths) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+    }
+    print(f"Processed {summary['images']} images ({errors} errors) in {summary['seconds']}s: "
+          f"{summary['images_per_second']} images/s, p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms",
+          file=sys.stderr)
+    return summary
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Micro-benchmarks for the Screenshot Ingestor pipeline. Run from the repository root."""
@@ -0,0 +1,92 @@
+# benchmarks/bench_correction.py
+"""Correction latency for a simulated 50-line stash screenshot.
+
+Usage: python -m benchmarks.bench_correction [--lines 50] [--repeat 20]
+"""
+import argparse
+import random
+import statistics
+import time
+from rapidfuzz import fuzz, process, utils as fuzz_utils
+from correction import TermCorrector
+from item_index import ItemNameIndex
+from settings import Config, load_autocorrect_rules, load_item_name_lookup
+
+def ocr_noise(text: str, rng: random.Random) -> str:
+    """Applies the kind of damage OCR does to short labels: dropped and swapped characters."""
+    chars = list(text)
+    if len(chars) > 3 and rng.random() < 0.5:
+        del chars[rng.randrange(len(chars))]
+    if len(chars) > 3 and rng.random() < 0.3:
+        i = rng.randrange(len(chars) - 1)
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return ''.join(chars)
+
+def make_lines(index: ItemNameIndex, count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    picks = rng.sample(range(len(index)), count)
+    return [ocr_noise(index.short_names[i] or index.names[i], rng) for i in picks]
+
+def legacy_category_scan(lookup: dict, lines: list) -> list:
+    """The original per-line extractOne against the category keys of item_names.json."""
+    out = []
+    for line in lines:
+        best, score, _ = process.extractOne(line.lower(), lookup.keys(), processor=fuzz_utils.default_process)
+        out.append(best if score >= Config.FUZZY_MATCH_THRESHOLD else line)
+    return out
+
+def naive_item_scan(names: list, lines: list) -> list:
+    """A per-call pure-Python scan over every item name, the obvious fix without an index."""
+    out = []
+    for line in lines:
+        query = fuzz_utils.default_process(line)
+        best, best_score = line, 0
+        for name in names:
+            score = fuzz.WRatio(query, fuzz_utils.default_process(name))
+            if score > best_score:
+                best, best_score = name, score
+        out.append(best if best_score >= Config.FUZZY_MATCH_THRESHOLD else line)
+    return out
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(label: str, samples: list):
+    print(f"{label:<34} median {statistics.median(samples):9.2f} ms   min {min(samples):9.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    lookup = load_item_name_lookup()
+    start = time.perf_counter()
+    index = ItemNameIndex.from_lookup(lookup)
+    print(f"Index build: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({len(index)} items, {len(index.keys)} keys)")
+    lines = make_lines(index, args.lines)
+    names = list(index.names)
+
+    report("before: extractOne on categories", timed(lambda: legacy_category_scan(lookup, lines), args.repeat))
+    report("before: pure-Python item scan", timed(lambda: naive_item_scan(names, lines), max(1, args.repeat // 10)))
+    report("after: index.match per line", timed(lambda: [index.match(line) for line in lines], args.repeat))
+    report("after: index.match_many (cdist)", timed(lambda: index.match_many(lines), args.repeat))
+    corrector = TermCorrector(load_autocorrect_rules(), index)
+    results = [(None, line, 1.0) for line in lines]
+    corrector.correct_results(results)
+    report("after: correct_results, warm memo", timed(lambda: corrector.correct_results(results), args.repeat))
+
+    matched = sum(1 for m in index.match_many(lines) if m is not None)
+    categories = set(lookup.keys())
+    wrong = sum(1 for c in legacy_category_scan(lookup, lines) if c in categories)
+    print(f"Lines matched to an item: {matched}/{len(lines)}; "
+          f"legacy lines rewritten to a category name: {wrong}/{len(lines)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_image_path.py
+"""Time and peak memory per image from load to the array easyocr's readtext works on.
+
+Compares the old path (decode for display, decode again for validation, thumbnail in
+place, JPEG re-encode for clipboard images, easyocr decoding files or bytes itself)
+with the single-decode path (one decode, one RGB buffer handed to readtext as is).
+The OCR models are not run: both paths stop at easyocr.utils.reformat_input, which
+is where readtext turns its input into arrays. Each variant runs in its own process
+so peak RSS is not shared between them.
+
+Usage: python -m benchmarks.bench_image_path [--width 2560] [--height 1440] [--repeat 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+import cv2
+from PIL import Image, ImageDraw
+from easyocr.utils import reformat_input
+from image_processing import thumbnail_size
+from settings import Config
+from utils import to_pixels
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DISPLAY_SIZE = (Config.DEFAULT_IMAGE_WIDTH, Config.DEFAULT_IMAGE_HEIGHT)
+
+def make_screenshot(path: str, width: int, height: int):
+    """Draws a stash-like grid of labelled cells, so PNG decoding costs about what a real screenshot does."""
+    img = Image.new("RGB", (width, height), (24, 26, 24))
+    draw = ImageDraw.Draw(img)
+    cell = 64
+    for y in range(0, height - cell, cell):
+        for x in range(0, width - cell, cell):
+            shade = (x * 7 + y * 13) % 60
+            draw.rectangle([x + 1, y + 1, x + cell - 2, y + cell - 2], fill=(40 + shade, 44 + shade, 40 + shade),
+                           outline=(90, 90, 90))
+            draw.text((x + 4, y + 3), f"It{(x + y) % 97}", fill=(220, 220, 220))
+    img.save(path)
+
+def legacy_file(path: str):
+    img = Image.open(path)
+    if cv2.imread(path) is None:
+        raise ValueError(path)
+    img.thumbnail(DISPLAY_SIZE)
+    return reformat_input(img.filename)
+
+def legacy_clipboard(source: Image.Image):
+    img = source.copy()  # thumbnail() shrank the caller's image in place
+    img.thumbnail(DISPLAY_SIZE)
+    buffered = BytesIO()
+    img.convert("RGB").save(buffered, format="JPEG")
+    return reformat_input(buffered.getvalue())
+
+def single_decode(img: Image.Image):
+    pixels = to_pixels(img)
+    size = thumbnail_size(img.size, DISPLAY_SIZE)
+    img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    return reformat_input(pixels)
+
+def single_file(path: str):
+    img = Image.open(path)
+    img.load()
+    return single_decode(img)
+
+VARIANTS = {
+    "before: file": (legacy_file, False),
+    "after: file": (single_file, False),
+    "before: clipboard": (legacy_clipboard, True),
+    "after: clipboard": (single_decode, True),
+}
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+def run_variant(name: str, path: str, repeat: int):
+    """Runs in a child process and prints one result line for the parent to collect."""
+    fn, from_memory = VARIANTS[name]
+    source = Image.open(path).convert("RGB") if from_memory else path
+    baseline = peak_rss_mb()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        img, _ = fn(source)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{statistics.median(samples)}\t{peak_rss_mb() - baseline}\t{img.shape[1]}x{img.shape[0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    parser.add_argument("--image", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        run_variant(args.variant, args.image, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "screenshot.png")
+        make_screenshot(path, args.width, args.height)
+        print(f"{args.width}x{args.height} PNG, {os.path.getsize(path) / 1024:.0f} KiB, "
+              f"raw RGB {args.width * args.height * 3 / (1 << 20):.1f} MiB")
+        print(f"{'variant':<20} {'median':>10} {'peak RSS':>12}  OCR input")
+        for name in VARIANTS:
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_image_path", "--variant", name,
+                                     "--image", path, "--repeat", str(args.repeat)],
+                                    capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+            ms, rss, shape = output.split("\t")
+            print(f"{name:<20} {float(ms):7.1f} ms {float(rss):8.1f} MiB  {shape}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_ocr_profile.py
+"""CPU compute time of easyocr's networks under the default and fast_cpu OCR profiles.
+
+Builds easyocr's CRAFT detector and english_g2 recognizer with random weights, so no
+model download is needed; their cost depends on input size, not on weight values.
+The detector runs at the canvas each profile resizes a screenshot to, the recognizer
+on label-sized crops, each with and without dynamic quantization. Accuracy needs the
+real models: run benchmarks.run --ocr easyocr once per --profile and --compare them.
+
+Usage: python -m benchmarks.bench_ocr_profile [--repeat 3] [--threads N] [--labels 40]
+"""
+import argparse
+import os
+import statistics
+import time
+import torch
+import easyocr
+from easyocr.config import recognition_models
+from easyocr.craft import CRAFT
+from easyocr.detection import get_textbox
+from easyocr.easyocr import BASE_PATH
+from easyocr.model.vgg_model import Model
+from easyocr.utils import CTCLabelConverter
+from ocr import profile_params
+from settings import Config
+
+SCREEN_SIZES = [(1920, 1080), (2560, 1440)]
+
+def canvas(size, params: dict):
+    """The (width, height) easyocr's resize_aspect_ratio() feeds the detector, rounded up to 32."""
+    width, height = size
+    target = min(params.get("mag_ratio", 1.0) * max(width, height), params.get("canvas_size", 2560))
+    ratio = target / max(width, height)
+    return tuple(-(-int(side * ratio) // 32) * 32 for side in (width, height))
+
+def median_ms(fn, repeat: int) -> float:
+    fn()  # Warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def quantized(net):
+    return torch.quantization.quantize_dynamic(net, dtype=torch.qint8)
+
+def random_weight_reader(quantize: bool = True) -> easyocr.Reader:
+    """An English CPU easyocr.Reader whose CRAFT detector and english_g2 recognizer have random weights.
+
+    Its timings stand in for the real models' (same architectures and input sizes), its
+    text does not. The random detector finds no text, so full-page OCR times are detection only.
+    """
+    reader = easyocr.Reader(["en"], gpu=False, detector=False, recognizer=False, verbose=False)
+    reader.detect_network = "craft"
+    reader.get_textbox = get_textbox
+    reader.detector = CRAFT().eval()
+    reader.converter = CTCLabelConverter(reader.character, {}, {"en": os.path.join(BASE_PATH, "dict", "en.txt")})
+    reader.recognizer = Model(1, 256, 256, len(reader.converter.character)).eval()
+    if quantize:
+        reader.detector = quantized(reader.detector)
+        reader.recognizer = quantized(reader.recognizer)
+    return reader
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="Torch intra-op threads (default: torch's)")
+    parser.add_argument("--labels", type=int, default=40, help="Label crops recognized per screenshot")
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    profiles = {"default": profile_params("default"), "fast_cpu": profile_params("fast_cpu")}
+    print(f"torch {torch.__version__}, {torch.get_num_threads()} threads, fast_cpu canvas {Config.OCR_FAST_CANVAS_SIZE}")
+
+    detector = CRAFT().eval()
+    quant_detector = quantized(detector)
+    print(f"{'detector':<28} {'canvas':>10} {'float32':>10} {'quantized':>10}")
+    with torch.no_grad():
+        for size in SCREEN_SIZES:
+            for name, params in profiles.items():
+                width, height = canvas(size, params)
+                x = torch.rand(1, 3, height, width)
+                plain = median_ms(lambda: detector(x), args.repeat)
+                quant = median_ms(lambda: quant_detector(x), args.repeat)
+                print(f"{size[0]}x{size[1]} {name:<18} {width:>5}x{height:<4} {plain:8.0f}ms {quant:8.0f}ms", flush=True)
+
+    model = recognition_models["gen2"]["english_g2"]
+    recognizer = Model(1, 256, 256, len(model["characters"]) + 1).eval()
+    crops = torch.rand(args.labels, 1, 64, 256)
+    print(f"{'recognizer':<28} {'crops':>10} {'float32':>10} {'quantized':>10}")
+    with torch.no_grad():
+        quant = quantized(recognizer)
+        plain_ms = median_ms(lambda: [recognizer(crop[None], None) for crop in crops], args.repeat)
+        quant_ms = median_ms(lambda: [quant(crop[None], None) for crop in crops], args.repeat)
+        print(f"{'one crop at a time (CPU)':<28} {args.labels:>10} {plain_ms:8.0f}ms {quant_ms:8.0f}ms")
+
+if __name__ == "__main__":
+    main()
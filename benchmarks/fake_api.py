@@ -0,0 +1,132 @@
+# benchmarks/fake_api.py
+"""Local stand-in for the tarkov.dev GraphQL endpoint.
+
+Answers the full items list and plain or aliased itemsByName queries from data/item_names.json with
+deterministic fake prices, so TarkovAPI can be exercised without a network. throttle() makes
+it answer the next requests with 429 and a Retry-After, like the real API under load.
+
+Usage: python -m benchmarks.fake_api [--port 8765] [--latency 0.05] [--jitter 0.02]
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from settings import load_item_name_lookup
+
+FIELD_PATTERN = re.compile(r"(?:(\w+)\s*:\s*)?itemsByName\s*\(\s*name\s*:\s*\$(\w+)\s*\)")
+ALL_ITEMS_PATTERN = re.compile(r"\bitems\s*\{")
+
+class FakeCatalogue:
+    def __init__(self, lookup: dict):
+        self.items = {}
+        for items in lookup.values():
+            for item in items:
+                if item.get("name") and item["id"] not in self.items:
+                    base = zlib.crc32(item["id"].encode()) % 90000 + 1000
+                    self.items[item["id"]] = {
+                        "id": item["id"],
+                        "name": item["name"],
+                        "shortName": item.get("shortName"),
+                        "avg24hPrice": base * 2,
+                        "basePrice": base,
+                        "wikiLink": f"https://escapefromtarkov.fandom.com/wiki/{item['name'].replace(' ', '_')}",
+                    }
+        self.rows = list(self.items.values())
+
+    def items_by_name(self, name: str) -> list:
+        """Case-insensitive substring match on name, like the real itemsByName."""
+        needle = name.lower()
+        return [row for row in self.rows if needle in row["name"].lower()]
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeTarkovAPI/1.0"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.stats_lock:
+            server.request_count += 1
+            throttled = server.throttled > 0
+            if throttled:
+                server.throttled -= 1
+        if throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        try:
+            payload = json.loads(body)
+            query = payload["query"]
+            variables = payload.get("variables") or {}
+            data = {}
+            if ALL_ITEMS_PATTERN.search(query):
+                data["items"] = server.catalogue.rows
+            for alias, variable in FIELD_PATTERN.findall(query):
+                data[alias or "itemsByName"] = server.catalogue.items_by_name(variables[variable])
+            response, status = {"data": data}, 200
+        except (ValueError, KeyError) as e:
+            response, status = {"errors": [{"message": str(e)}]}, 400
+        encoded = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], catalogue: FakeCatalogue, latency: float = 0.0, jitter: float = 0.0):
+        super().__init__(address, FakeAPIHandler)
+        self.catalogue = catalogue
+        self.latency = latency
+        self.jitter = jitter
+        self.request_count = 0
+        self.throttled = 0
+        self.retry_after = 1
+        self.stats_lock = threading.Lock()
+
+    def throttle(self, count: int, retry_after: int = 1):
+        """Answers the next count requests with 429 Too Many Requests and a Retry-After of retry_after seconds."""
+        with self.stats_lock:
+            self.throttled = count
+            self.retry_after = retry_after
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+def start_fake_api(port: int = 0, latency: float = 0.0, jitter: float = 0.0) -> FakeAPIServer:
+    """Starts the fake API on a background thread; port 0 picks a free port."""
+    server = FakeAPIServer(("127.0.0.1", port), FakeCatalogue(load_item_name_lookup()), latency, jitter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds, uniformly random")
+    args = parser.parse_args()
+    server = FakeAPIServer(("127.0.0.1", args.port), FakeCatalogue(load_item_name_lookup()), args.latency, args.jitter)
+    print(f"Fake API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# benchmarks/run.py
+"""End-to-end pipeline benchmark on synthetic screenshots, with JSON output for diffing between commits.
+
+Renders screenshots with known contents (benchmarks.synthetic), serves prices from the
+local fake API (benchmarks.fake_api) and runs every screenshot through decode, OCR,
+correction and price lookup, timing each stage. Needs no network and no GPU: when the
+easyocr models are not available locally, OCR is simulated from the ground truth with
+OCR-style noise, so the other stages and the correction accuracy are still measured.
+
+Usage: python -m benchmarks.run [--images 10] [--latency 0.05] [--ocr auto|easyocr|random-weights|simulated] [--grid]
+                                [--profile default|fast_cpu] [--torch-threads N] [--no-quantize] [--refine]
+                                [--output results.json]
+       python -m benchmarks.run --compare before.json after.json
+
+To weigh an OCR profile's latency against its accuracy, run the same seed once per
+profile with --ocr easyocr and compare the two files; likewise with and without --refine.
+--ocr random-weights runs the real OCR pipeline on easyocr's networks with random weights
+(see benchmarks.bench_ocr_profile): OCR timings without a model download, but no accuracy.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from api import TarkovAPI
+from batch import percentile
+from correction import TermCorrector
+from catalogue import load_item_index
+from price_cache import PriceCache
+from settings import OCR_PROFILES, load_autocorrect_rules
+from utils import to_pixels
+from benchmarks.bench_correction import ocr_noise
+from benchmarks.fake_api import start_fake_api
+from benchmarks.synthetic import generate, load_ground_truth
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCHEMA_VERSION = 1
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 1)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(samples: List[float]) -> dict:
+    """Latency percentiles in milliseconds for one stage."""
+    values = sorted(samples)
+    return {"count": len(values),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 0.5) * 1000, 3),
+            "p90_ms": round(percentile(values, 0.9) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0}
+
+class SimulatedOCR:
+    """Stands in for OCRProcessor: returns each visible label with OCR-style damage."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def extract_text(self, truth: List[dict]) -> list:
+        results = []
+        for item in truth:
+            x, y, w = item["x"], item["y"], item["width"]
+            bbox = [[x, y], [x + w, y], [x + w, y + 16], [x, y + 16]]
+            results.append((bbox, ocr_noise(item["label"], self.rng), 1.0))
+        return results
+
+def easyocr_models_present() -> bool:
+    """True if easyocr's English models are on disk, so loading them will not try to download."""
+    base = os.environ.get("EASYOCR_MODULE_PATH") or os.path.join(os.path.expanduser("~"), ".EasyOCR")
+    return all(os.path.exists(os.path.join(base, "model", name)) for name in ("craft_mlt_25k.pth", "english_g2.pth"))
+
+def load_ocr(backend: str, seed: int, profile: str = "default", quantize: bool = True, torch_threads: int = 0,
+             refine: bool = False):
+    """Returns (name, processor, note); falls back to simulated OCR when easyocr cannot load in auto mode."""
+    if backend == "simulated":
+        return "simulated", SimulatedOCR(seed), "requested"
+    if backend == "random-weights":
+        from ocr import OCRProcessor
+        from benchmarks.bench_ocr_profile import random_weight_reader
+        ocr = OCRProcessor(use_gpu=False, use_cache=False, profile=profile, quantize=quantize,
+                           torch_threads=torch_threads, refine=refine, reader=random_weight_reader(quantize))
+        return "easyocr-random-weights", ocr, "random weights: OCR timings only, accuracy is meaningless"
+    if backend == "auto" and not easyocr_models_present():
+        return "simulated", SimulatedOCR(seed), "easyocr models not downloaded"
+    try:
+        from ocr import OCRProcessor
+        return "easyocr", OCRProcessor(use_gpu=False, use_cache=False, profile=profile, quantize=quantize,
+                                       torch_threads=torch_threads, refine=refine), None
+    except Exception as e:
+        if backend == "easyocr":
+            raise
+        return "simulated", SimulatedOCR(seed), f"easyocr unavailable: {e!r}"[:300]
+
+def score(predicted: Counter, truth: Counter) -> dict:
+    matched = sum((predicted & truth).values())
+    total_predicted, total_truth = sum(predicted.values()), sum(truth.values())
+    return {"truth_items": total_truth, "predicted_items": total_predicted, "matched": matched,
+            "precision": round(matched / total_predicted, 4) if total_predicted else 0.0,
+            "recall": round(matched / total_truth, 4) if total_truth else 0.0}
+
+def run(images: int, seed: int, latency: float, jitter: float, backend: str, grid: bool,
+        image_dir: Optional[str] = None, profile: str = "default", quantize: bool = True,
+        torch_threads: int = 0, refine: bool = False) -> dict:
+    stages: Dict[str, List[float]] = {"decode": [], "ocr": [], "correct": [], "price": []}
+    server = start_fake_api(latency=latency, jitter=jitter)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate(image_dir or tmp, images, seed)
+        corrector = TermCorrector(load_autocorrect_rules(), load_item_index())
+        api = TarkovAPI(server.url, cache=PriceCache(":memory:"))
+        ocr_name, ocr, ocr_note = load_ocr(backend, seed, profile, quantize, torch_threads, refine)
+
+        predicted, truth = Counter(), Counter()
+        start = time.perf_counter()
+        for path in paths:
+            ground_truth = load_ground_truth(path)
+            truth.update(item["name"] for item in ground_truth)
+
+            t0 = time.perf_counter()
+            pixels = to_pixels(path)
+            t1 = time.perf_counter()
+            if ocr_name.startswith("easyocr"):
+                results = ocr.extract_text(pixels, grid)
+            else:
+                results = ocr.extract_text(ground_truth)
+            t2 = time.perf_counter()
+            lines, counts = corrector.correct_results(results)
+            t3 = time.perf_counter()
+            api.get_items_data(counts.keys())
+            t4 = time.perf_counter()
+
+            for stage, seconds in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                stages[stage].append(seconds)
+            predicted.update(counts)
+        wall = time.perf_counter() - start
+    server.shutdown()
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"images": images, "seed": seed, "latency_s": latency, "jitter_s": jitter, "grid": grid,
+                   "ocr": ocr_name, "ocr_note": ocr_note, "profile": profile, "quantize": quantize,
+                   "torch_threads": torch_threads or None, "refine": refine},
+        "images_per_second": round(len(paths) / wall, 3) if wall else 0.0,
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(samples) for stage, samples in stages.items()},
+        "accuracy": score(predicted, truth),
+        "api_requests": server.request_count,
+    }
+
+def compare(before_path: str, after_path: str):
+    """Prints the change of every stage percentile and headline number between two result files."""
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+
+    def row(label, old, new):
+        if old is None or new is None:
+            return
+        change = f"{(new - old) / old * 100:+7.1f}%" if old else "      -"
+        print(f"{label:<26} {old:>12} {new:>12} {change}")
+
+    print(f"{'metric':<26} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12}")
+    for stage in after["stages"]:
+        for key in ("p50_ms", "p90_ms", "p99_ms"):
+            row(f"{stage} {key}", before["stages"].get(stage, {}).get(key), after["stages"][stage][key])
+    row("images_per_second", before.get("images_per_second"), after.get("images_per_second"))
+    row("peak_rss_mb", before.get("peak_rss_mb"), after.get("peak_rss_mb"))
+    for key in ("precision", "recall"):
+        row(f"accuracy {key}", before["accuracy"][key], after["accuracy"][key])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake API latency per request, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random fake API latency, in seconds")
+    parser.add_argument("--ocr", choices=["auto", "easyocr", "random-weights", "simulated"], default="auto")
+    parser.add_argument("--grid", action="store_true", help="Use stash grid mode for easyocr")
+    parser.add_argument("--profile", choices=list(OCR_PROFILES), default="default", help="easyocr OCR profile")
+    parser.add_argument("--torch-threads", type=int, default=0, help="Torch intra-op threads (default: torch's)")
+    parser.add_argument("--no-quantize", dest="quantize", action="store_false",
+                        help="Run easyocr's models unquantized")
+    parser.add_argument("--refine", action="store_true", help="Re-read doubtful easyocr text from enhanced crops")
+    parser.add_argument("--keep-images", metavar="DIR", help="Write the synthetic screenshots here instead of a temp dir")
+    parser.add_argument("-o", "--output", default="-", help="Result JSON file, '-' for stdout (default)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.keep_images:
+        os.makedirs(args.keep_images, exist_ok=True)
+    result = run(args.images, args.seed, args.latency, args.jitter, args.ocr, args.grid, args.keep_images,
+                 args.profile, args.quantize, args.torch_threads, args.refine)
+    encoded = json.dumps(result, indent=2, sort_keys=True)
+    if args.output == "-":
+        print(encoded)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/synthetic.py
+"""Renders stash-like screenshots from data/item_names.json, each with a ground-truth JSON sidecar.
+
+Every item is drawn as a bordered grid cell (or a block of cells) with its shortName
+in the top-right corner, the way the game labels items, over a random icon-like shape.
+The sidecar lists every item's grid position, pixel rectangle, id, name, shortName
+and the label as drawn, which is clipped like in game when it does not fit.
+
+Usage: python -m benchmarks.synthetic OUT_DIR [--count 10] [--seed 1] [--width 1920] [--height 1080]
+"""
+import argparse
+import json
+import os
+import random
+from typing import List, Tuple
+from PIL import Image, ImageDraw, ImageFont
+from settings import load_item_name_lookup
+
+# Item footprints in cells (cols, rows) and how often they occur; most stash items are 1x1.
+FOOTPRINTS = [((1, 1), 0.7), ((2, 1), 0.12), ((1, 2), 0.08), ((2, 2), 0.06), ((3, 1), 0.04)]
+
+def catalogue_items(lookup: dict) -> List[dict]:
+    """Unique items that have a shortName, in a stable order."""
+    items, seen = [], set()
+    for category in sorted(lookup):
+        for item in lookup[category]:
+            if item.get("name") and item.get("shortName") and item["id"] not in seen:
+                seen.add(item["id"])
+                items.append({"id": item["id"], "name": item["name"], "shortName": item["shortName"]})
+    return items
+
+def render_stash(items: List[dict], rng: random.Random, size: Tuple[int, int] = (1920, 1080),
+                 cell: int = 63, gap: int = 1, cols: int = 10) -> Tuple[Image.Image, List[dict]]:
+    """Draws one stash page filled with random items and returns it with its ground truth."""
+    width, height = size
+    pitch = cell + gap
+    rows = max(1, (height - 2 * cell) // pitch)
+    origin = ((width - cols * pitch) // 2, cell)
+    img = Image.new("RGB", size, (14, 16, 14))
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=max(8, cell // 5))
+    used = set()
+    truth = []
+    for row in range(rows):
+        for col in range(cols):
+            if (row, col) in used:
+                continue
+            (item_cols, item_rows), = rng.choices([f for f, _ in FOOTPRINTS], [w for _, w in FOOTPRINTS])
+            footprint = {(row + r, col + c) for r in range(item_rows) for c in range(item_cols)}
+            if col + item_cols > cols or row + item_rows > rows or footprint & used:
+                item_cols, item_rows, footprint = 1, 1, {(row, col)}
+            used |= footprint
+            item = rng.choice(items)
+            x, y = origin[0] + col * pitch, origin[1] + row * pitch
+            right, bottom = x + item_cols * pitch - gap - 1, y + item_rows * pitch - gap - 1
+            shade = rng.randint(28, 70)
+            draw.rectangle([x, y, right, bottom], fill=(shade, shade + 3, shade), outline=(96, 98, 92))
+            icon = (rng.randint(60, 200), rng.randint(60, 160), rng.randint(30, 120))
+            inset = cell // 4
+            if rng.random() < 0.5:
+                draw.ellipse([x + inset, y + inset + 4, right - inset, bottom - inset // 2], fill=icon)
+            else:
+                draw.rectangle([x + inset, y + inset + 6, right - inset, bottom - inset], fill=icon)
+            # The game clips labels that do not fit the item; the ground truth keeps what is visible.
+            label = item["shortName"]
+            while len(label) > 1 and draw.textlength(label, font=font) > right - x - 6:
+                label = label[:-1]
+            draw.text((right - 3 - draw.textlength(label, font=font), y + 2), label, fill=(222, 222, 214), font=font)
+            truth.append({"row": row, "col": col, "rows": item_rows, "cols": item_cols, "x": x, "y": y,
+                          "width": right - x + 1, "height": bottom - y + 1, "label": label, **item})
+    return img, truth
+
+def generate(out_dir: str, count: int, seed: int = 1, size: Tuple[int, int] = (1920, 1080)) -> List[str]:
+    """Writes count screenshots and their sidecars to out_dir and returns the image paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    items = catalogue_items(load_item_name_lookup())
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        img, truth = render_stash(items, rng, size)
+        path = os.path.join(out_dir, f"stash_{i:03d}.png")
+        img.save(path)
+        with open(ground_truth_path(path), "w", encoding="utf-8") as f:
+            json.dump({"image": os.path.basename(path), "size": list(size), "items": truth}, f, indent=1)
+        paths.append(path)
+    return paths
+
+def ground_truth_path(image_path: str) -> str:
+    return os.path.splitext(image_path)[0] + ".json"
+
+def load_ground_truth(image_path: str) -> List[dict]:
+    with open(ground_truth_path(image_path), encoding="utf-8") as f:
+        return json.load(f)["items"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    paths = generate(args.out_dir, args.count, args.seed, (args.width, args.height))
+    print(f"Wrote {len(paths)} screenshots to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
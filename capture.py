@@ -0,0 +1,244 @@
+# capture.py
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from settings import AppSettings, Config
+from image_processing import GridCell, detect_grid
+from api import TarkovAPI
+from ocr_service import OCRService
+import batch
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+Region = Tuple[int, int, int, int]
+
+def parse_region(text: str) -> Optional[dict]:
+    """Parses "left,top,width,height" into an mss monitor dict; an empty string means no region."""
+    if not text or not text.strip():
+        return None
+    left, top, width, height = (int(part) for part in text.split(","))
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Capture region must have a positive size: {text}")
+    return {"left": left, "top": top, "width": width, "height": height}
+
+def frame_tiles(frame: np.ndarray) -> Tuple[List[Tuple[tuple, Region, Region, Optional[GridCell]]], int]:
+    """Splits a frame into the regions that are OCR'd independently.
+
+    When a stash grid is visible every item's label strip is a tile, keyed by its
+    grid position, so icon animations and hover highlights do not trigger OCR.
+    Otherwise the frame is cut into Config.CAPTURE_TILE_SIZE squares, each read
+    with Config.CAPTURE_TILE_MARGIN pixels of its neighbours around it. A tile only
+    keeps text centred in its own square, so a label up to twice the margin wide is
+    read whole by exactly one tile, wherever the tile edges fall.
+
+    Returns:
+        tuple: (key, read region, own region, grid cell) per tile, with the regions as
+        (x, y, width, height) rects, and the grid's unit cell size, 0 if no grid was
+        found. Grid tiles own their whole label strip; other tiles have no cell.
+    """
+    cells, cell_size = detect_grid(frame)
+    if cells:
+        tiles = []
+        for cell in cells:
+            x_min, x_max, y_min, y_max = cell.label_box(cell_size)
+            rect = (x_min, y_min, x_max - x_min, y_max - y_min)
+            tiles.append((_cell_key(cell.as_dict()), rect, rect, cell))
+        return tiles, cell_size
+    size, margin = Config.CAPTURE_TILE_SIZE, Config.CAPTURE_TILE_MARGIN
+    height, width = frame.shape[:2]
+    tiles = []
+    for y in range(0, height, size):
+        for x in range(0, width, size):
+            left, top = max(0, x - margin), max(0, y - margin)
+            right, bottom = min(width, x + size + margin), min(height, y + size + margin)
+            tiles.append(((x, y), (left, top, right - left, bottom - top),
+                          (x, y, min(size, width - x), min(size, height - y)), None))
+    return tiles, 0
+
+def _cell_key(cell: dict) -> tuple:
+    return cell["row"], cell["col"], cell["rows"], cell["cols"]
+
+def _centred_in(bbox, offset: Tuple[int, int], rect: Region) -> bool:
+    """Whether a bbox read from a crop at offset has its centre inside rect, in frame coordinates."""
+    points = np.asarray(bbox, dtype=np.float32).reshape(-1, 2)
+    cx, cy = points.mean(axis=0) + offset
+    x, y, width, height = rect
+    return x <= cx < x + width and y <= cy < y + height
+
+class _Tile:
+    """What a tile looked like when it was last OCR'd, and what was read from it."""
+    __slots__ = ("grey", "lines", "counts")
+
+    def __init__(self, grey: np.ndarray, lines: List[str], counts: Dict[str, int]):
+        self.grey = grey
+        self.lines = lines
+        self.counts = counts
+
+class LiveCapture:
+    """Captures a screen region at a fixed rate and keeps OCR results and prices for it up to date.
+
+    Each frame is split into tiles (see frame_tiles). A tile counts as changed when
+    its pixels differ from the ones it was last read from by more than
+    Config.CAPTURE_CHANGE_THRESHOLD grey levels on average; every other tile keeps
+    its text and counts. On a stash grid, only the label strips of the changed cells
+    are read, in one job; otherwise each changed tile is OCR'd on its own. Live
+    frames bypass the OCR cache, since they are rarely seen twice. Prices are only
+    looked up again when the totals change. on_update is called from the capture
+    thread after every frame.
+
+    The region is required: capturing the whole screen would read the app's own
+    results panel back in.
+    """
+
+    def __init__(self, service, corrector, api, region: dict, fps: float = Config.CAPTURE_FPS,
+                 on_update: Optional[Callable[[dict], None]] = None, refine: bool = False):
+        if mss is None:
+            raise RuntimeError("mss is not installed. Please install it by running: pip install mss")
+        if not region:
+            raise ValueError("A capture region (left,top,width,height) is required")
+        self.service = service
+        self.corrector = corrector
+        self.api = api
+        self.region = region
+        self.interval = 1.0 / max(0.1, fps)
+        self.on_update = on_update
+        self.refine = refine
+        self.tiles: Dict[tuple, _Tile] = {}
+        self.counts: Dict[str, int] = {}
+        self.items_data: dict = {}
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LiveCapture":
+        self.thread = threading.Thread(target=self._run, name="live-capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self):
+        # mss handles are bound to the thread that created them.
+        with mss.mss() as screen:
+            logging.info(f"Live capture of {self.region} at {1.0 / self.interval:.1f} fps")
+            while not self.stop_event.is_set():
+                start = time.perf_counter()
+                try:
+                    frame = cv2.cvtColor(np.asarray(screen.grab(self.region)), cv2.COLOR_BGRA2RGB)
+                    update = self.process_frame(frame)
+                    if self.on_update is not None:
+                        self.on_update(update)
+                except Exception as e:
+                    logging.error(f"Error during live capture: {e}", exc_info=True)
+                self.stop_event.wait(max(0.0, self.interval - (time.perf_counter() - start)))
+
+    def process_frame(self, frame: np.ndarray) -> dict:
+        """OCRs the tiles of an RGB frame that changed and returns the combined, priced result."""
+        start = time.perf_counter()
+        grey = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        tiles, cell_size = frame_tiles(frame)
+
+        current: Dict[tuple, _Tile] = {}
+        changed = []
+        for key, (x, y, width, height), own, cell in tiles:
+            crop = grey[y:y + height, x:x + width]
+            tile = self.tiles.get(key)
+            if tile is not None and tile.grey.shape == crop.shape \
+                    and cv2.absdiff(tile.grey, crop).mean() <= Config.CAPTURE_CHANGE_THRESHOLD:
+                current[key] = tile
+            else:
+                changed.append((key, (x, y, width, height), own, cell, crop.copy()))
+
+        # Tiles whose OCR fails are left out of self.tiles, so they are retried on the next frame.
+        if changed and cell_size:
+            try:
+                by_cell: Dict[tuple, list] = {}
+                future = self.service.submit(frame, use_cache=False, cells=[change[3] for change in changed],
+                                             cell_size=cell_size, refine=self.refine)
+                for result in future.result():
+                    by_cell.setdefault(_cell_key(result[3]), []).append(result)
+                for key, _, _, _, crop in changed:
+                    current[key] = _Tile(crop, *self.corrector.correct_results(by_cell.get(key, [])))
+            except Exception as e:
+                logging.error(f"Grid OCR failed for live frame: {e}")
+        elif changed:
+            jobs = [(key, (x, y), own, crop,
+                     self.service.submit(frame[y:y + height, x:x + width], use_cache=False, refine=self.refine))
+                    for key, (x, y, width, height), own, _, crop in changed]
+            for key, offset, own, crop, future in jobs:
+                try:
+                    results = [result for result in future.result() if _centred_in(result[0], offset, own)]
+                    current[key] = _Tile(crop, *self.corrector.correct_results(results))
+                except Exception as e:
+                    logging.error(f"OCR failed for live tile {key}: {e}")
+        self.tiles = current
+
+        counts: Dict[str, int] = {}
+        lines: List[str] = []
+        for key, _, _, _ in tiles:
+            tile = current.get(key)
+            if tile is None:
+                continue
+            lines.extend(line for line in tile.lines if line)
+            for name, count in tile.counts.items():
+                counts[name] = counts.get(name, 0) + count
+        if counts != self.counts:
+            self.items_data = self.api.get_items_data(counts.keys()) if counts else {}
+            self.counts = counts
+        return {"lines": lines, "counts": counts, "items_data": self.items_data, "grid": bool(cell_size),
+                "tiles": len(tiles), "changed": len(changed), "seconds": time.perf_counter() - start}
+
+def run_live(region: str = "", fps: Optional[float] = None, use_gpu: Optional[bool] = None):
+    """Runs live capture without the GUI, printing a JSON line whenever the priced items change."""
+    settings = AppSettings()
+    capture_region = parse_region(region or settings.capture_region)
+    if capture_region is None:
+        print("Pass --region left,top,width,height or set capture_region in the settings file", file=sys.stderr)
+        sys.exit(2)
+    use_gpu = settings.ocr_use_gpu if use_gpu is None else use_gpu
+    api = TarkovAPI()
+    if settings.use_price_snapshot:
+        api.enable_snapshot()
+    corrector = batch.make_corrector(settings.use_item_corrections)
+    service = OCRService.from_settings(settings, use_gpu).start()
+    last_counts = None
+
+    def on_update(update: dict):
+        nonlocal last_counts
+        print(f"{update['changed']}/{update['tiles']} tiles changed, {update['seconds'] * 1000:.0f} ms",
+              file=sys.stderr)
+        if update["counts"] == last_counts:
+            return
+        last_counts = update["counts"]
+        items = []
+        for item_name, count in update["counts"].items():
+            matches = update["items_data"].get(item_name.strip()) or [{"name": None, "avg24hPrice": None}]
+            items.extend({"item": item_name, "count": count, "name": match["name"],
+                          "avg24hPrice": match["avg24hPrice"]} for match in matches)
+        print(json.dumps({"time": time.time(), "items": items}), flush=True)
+
+    live = LiveCapture(service, corrector, api, capture_region, fps or settings.capture_fps, on_update,
+                       refine=settings.ocr_refine).start()
+    print("Live capture running (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        while live.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        live.stop()
+        service.shutdown()
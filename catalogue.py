@@ -0,0 +1,231 @@
+# catalogue.py
+"""Compiled, memory-mappable form of data/item_names.json.
+
+The JSON catalogue carries descriptions and icon links that matching never uses,
+and parsing it builds thousands of nested dicts on every start. compile_catalogue()
+keeps only what matching needs: item ids, names, shortNames, categories and the
+pre-normalized match keys of ItemNameIndex. Every string is stored once in a
+UTF-8 blob, and everything else is an array of indices into it.
+
+Layout: MAGIC, a uint32 header length, a JSON header, then 8-byte aligned arrays
+whose offsets, dtypes and lengths the header lists. Catalogue maps the file
+read-only, so worker processes opening the same file share its pages. Item ids,
+names and shortNames stay in the mapping and are decoded one at a time when
+looked up; only the match keys are decoded into each process, because rapidfuzz
+scores Python strings.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+import numpy as np
+from settings import Config, load_item_name_lookup
+from item_index import ItemNameIndex
+from utils import resource_path
+
+MAGIC = b"SICATLG\0"
+# Bump when the layout or the match key normalization changes, so old files count as stale.
+FORMAT_VERSION = 1
+
+def _source_fingerprint(path: str, digest: bool = True) -> dict:
+    stat = os.stat(path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if digest:
+        with open(path, "rb") as f:
+            fingerprint["blake2b"] = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    return fingerprint
+
+class _StringTable:
+    """Interns strings into one UTF-8 blob with start offsets."""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.encoded: List[bytes] = []
+
+    def add(self, text: str) -> int:
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.encoded)
+            self.encoded.append(text.encode("utf-8"))
+        return idx
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        offsets = np.zeros(len(self.encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in self.encoded], out=offsets[1:])
+        return {"string_offsets": offsets, "string_data": np.frombuffer(b"".join(self.encoded), dtype=np.uint8)}
+
+def compile_catalogue(source: str = Config.ITEM_NAMES_FILE, target: str = Config.ITEM_CATALOGUE_FILE) -> str:
+    """Compiles the JSON catalogue at source into target and returns the target path."""
+    source_path, target_path = resource_path(source), resource_path(target)
+    with open(source_path, "r", encoding="utf-8") as f:
+        lookup = json.load(f)
+    index = ItemNameIndex.from_lookup(lookup)
+    position = {item_id: i for i, item_id in enumerate(index.ids)}
+
+    strings = _StringTable()
+    entry_category, entry_item = [], []
+    categories = []
+    for category, items in lookup.items():
+        categories.append(strings.add(category))
+        for item in items:
+            idx = position.get(item.get("id"))
+            if idx is not None and item.get("name"):
+                entry_category.append(len(categories) - 1)
+                entry_item.append(idx)
+
+    arrays = {
+        "item_ids": np.array([strings.add(s) for s in index.ids], dtype=np.uint32),
+        "item_names": np.array([strings.add(s) for s in index.names], dtype=np.uint32),
+        "item_short_names": np.array([strings.add(s) for s in index.short_names], dtype=np.uint32),
+        "keys": np.array([strings.add(s) for s in index.keys], dtype=np.uint32),
+        "key_items": index.key_items.astype(np.int32),
+        "categories": np.array(categories, dtype=np.uint32),
+        "entry_category": np.array(entry_category, dtype=np.uint32),
+        "entry_item": np.array(entry_item, dtype=np.uint32),
+    }
+    arrays.update(strings.arrays())
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, len(array)]
+        offset += (array.nbytes + 7) & ~7
+    header = json.dumps({"version": FORMAT_VERSION, "source": _source_fingerprint(source_path),
+                         "arrays": layout}).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+    tmp_path = f"{target_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b"\0" * (-array.nbytes % 8))
+    os.replace(tmp_path, target_path)
+    logging.info(f"Compiled {len(index)} items and {len(index.keys)} match keys into {target_path}")
+    return target_path
+
+class _Strings(Sequence):
+    """A list-like view of strings in a compiled catalogue, decoded on each access."""
+
+    def __init__(self, catalogue: "Catalogue", indices: np.ndarray):
+        self.catalogue = catalogue
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.catalogue.strings(self.indices[i])
+        return self.catalogue.string(int(self.indices[i]))
+
+class Catalogue:
+    """Read-only view of a compiled catalogue; strings are decoded when they are used."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a compiled item catalogue: {path}")
+        header_len, = struct.unpack_from("<I", self.buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self.buffer[start:start + header_len])
+        base = start + header_len
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.frombuffer(self.buffer, dtype=dtype, count=length, offset=base + offset)
+            for name, (offset, dtype, length) in self.header["arrays"].items()}
+        self.string_offsets = self.arrays["string_offsets"]
+        self.string_data = self.arrays["string_data"]
+
+    def is_current(self, source: str) -> bool:
+        """True if this file was compiled by this FORMAT_VERSION from source as it is now.
+
+        Size and mtime decide when they match; otherwise (e.g. after a fresh checkout)
+        the source content hash does. Without a source file there is nothing to be stale against.
+        """
+        compiled = self.header.get("source", {})
+        if self.header.get("version") != FORMAT_VERSION:
+            return False
+        if not os.path.exists(source):
+            return True
+        current = _source_fingerprint(source, digest=False)
+        if current["size"] != compiled.get("size"):
+            return False
+        if current["mtime_ns"] == compiled.get("mtime_ns"):
+            return True
+        return _source_fingerprint(source)["blake2b"] == compiled.get("blake2b")
+
+    def string(self, i: int) -> str:
+        offsets = self.string_offsets
+        return bytes(self.string_data[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def strings(self, indices: np.ndarray) -> List[str]:
+        data, offsets = self.string_data, self.string_offsets
+        return [bytes(data[offsets[i]:offsets[i + 1]]).decode("utf-8") for i in indices.tolist()]
+
+    def item_index(self, score_cutoff: int = Config.FUZZY_MATCH_THRESHOLD) -> ItemNameIndex:
+        """Builds the fuzzy index from the stored keys, without normalizing the catalogue again.
+
+        The index's ids, names and shortNames are views into the mapping; its keys are
+        decoded here, since fuzzy matching needs them as Python strings.
+        """
+        arrays = self.arrays
+        return ItemNameIndex(_Strings(self, arrays["item_ids"]), _Strings(self, arrays["item_names"]),
+                             _Strings(self, arrays["item_short_names"]), score_cutoff,
+                             keys=self.strings(arrays["keys"]), key_items=arrays["key_items"])
+
+    def to_lookup(self) -> dict:
+        """The category -> [{id, name, shortName}] mapping, like load_item_name_lookup() without the extras."""
+        arrays = self.arrays
+        categories = self.strings(arrays["categories"])
+        ids = self.strings(arrays["item_ids"])
+        names = self.strings(arrays["item_names"])
+        short_names = self.strings(arrays["item_short_names"])
+        lookup = {category: [] for category in categories}
+        for category, idx in zip(arrays["entry_category"].tolist(), arrays["entry_item"].tolist()):
+            lookup[categories[category]].append({"id": ids[idx], "name": names[idx], "shortName": short_names[idx]})
+        return lookup
+
+def load_catalogue(source: str = Config.ITEM_NAMES_FILE, target: str = Config.ITEM_CATALOGUE_FILE) -> Optional[Catalogue]:
+    """Opens the compiled catalogue, or returns None if it is missing, unreadable or stale."""
+    target_path = resource_path(target)
+    if not os.path.exists(target_path):
+        return None
+    try:
+        catalogue = Catalogue(target_path)
+        if catalogue.is_current(resource_path(source)):
+            return catalogue
+        logging.warning(f"{target_path} is stale; using {source}. Run 'python main.py catalogue' to rebuild it.")
+    except (OSError, ValueError, KeyError) as e:
+        logging.error(f"Error opening compiled item catalogue: {e}", exc_info=True)
+    return None
+
+def item_charset() -> str:
+    """Every character used in item names and shortNames, plus digits; empty without a catalogue."""
+    catalogue = load_catalogue()
+    if catalogue is not None:
+        text = "".join(catalogue.strings(catalogue.arrays["item_names"])
+                       + catalogue.strings(catalogue.arrays["item_short_names"]))
+    else:
+        text = "".join((item.get("name") or "") + (item.get("shortName") or "")
+                       for items in load_item_name_lookup().values() for item in items)
+    return "".join(sorted(set(text) | set("0123456789"))) if text else ""
+
+def load_item_index(score_cutoff: int = Config.FUZZY_MATCH_THRESHOLD) -> ItemNameIndex:
+    """Builds the item index from the compiled catalogue, falling back to the JSON file."""
+    start = time.perf_counter()
+    catalogue = load_catalogue()
+    if catalogue is not None:
+        index = catalogue.item_index(score_cutoff)
+        source = "compiled catalogue"
+    else:
+        index = ItemNameIndex.from_lookup(load_item_name_lookup(), score_cutoff)
+        source = Config.ITEM_NAMES_FILE
+    logging.info(f"Item index loaded from {source} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return index
@@ -0,0 +1,127 @@
+# correction.py
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from settings import Config
+from utils import preprocess_search_term
+from item_index import ItemNameIndex
+from metrics import metrics
+
+class TermCorrector:
+    """Corrects OCR lines to item names using the autocorrect rules and the item index.
+
+    Corrections are memoized in a bounded LRU so labels that repeat across a stash
+    page, or across screenshots, are only scored once.
+    """
+
+    def __init__(self, autocorrect_rules: dict, item_index: Optional[ItemNameIndex],
+                 use_item_corrections: bool = True, memo_size: int = Config.CORRECTION_CACHE_SIZE):
+        self.autocorrect_rules = autocorrect_rules
+        self.item_index = item_index
+        self.use_item_corrections = use_item_corrections
+        self.memo_size = memo_size
+        self.memo: "OrderedDict[Tuple[str, bool], str]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def correct(self, term: str) -> str:
+        """Corrects a single OCR line."""
+        return self.correct_terms([term])[0]
+
+    @metrics.timed("correction.correct_terms")
+    def correct_terms(self, terms: List[str]) -> List[str]:
+        """Corrects many lines, scoring each distinct unmemoized term once in a single pass."""
+        use_index = self.use_item_corrections and self.item_index is not None and len(self.item_index) > 0
+        preprocessed = [preprocess_search_term(term) for term in terms]
+        corrected: Dict[str, str] = {}
+        unknown: List[str] = []
+        with self.lock:
+            for term in preprocessed:
+                if term in corrected:
+                    continue
+                key = (term.lower(), use_index)
+                if key in self.memo:
+                    self.memo.move_to_end(key)
+                    corrected[term] = self.memo[key]
+                    self.hits += 1
+                else:
+                    corrected[term] = term
+                    unknown.append(term)
+                    self.misses += 1
+
+        if unknown:
+            to_score = []
+            for term in unknown:
+                rule = self.autocorrect_rules.get(term.lower())
+                if rule is not None:
+                    corrected[term] = rule
+                elif use_index:
+                    to_score.append(term)
+            if to_score:
+                for term, idx in zip(to_score, self.item_index.match_many(to_score)):
+                    if idx is not None:
+                        corrected[term] = self.item_index.names[idx]
+
+            with self.lock:
+                for term in unknown:
+                    self.memo[(term.lower(), use_index)] = corrected[term]
+                while len(self.memo) > self.memo_size:
+                    self.memo.popitem(last=False)
+
+        return [corrected[term] for term in preprocessed]
+
+    def known_terms(self, terms: List[str]) -> List[bool]:
+        """Whether each OCR line corrects to something: an autocorrect rule or an item index match."""
+        preprocessed = [preprocess_search_term(term) for term in terms]
+        known = [term.lower() in self.autocorrect_rules for term in preprocessed]
+        if self.item_index is not None and len(self.item_index) > 0:
+            pending = [i for i, hit in enumerate(known) if not hit and preprocessed[i]]
+            for i, idx in zip(pending, self.item_index.match_many([preprocessed[i] for i in pending])):
+                known[i] = idx is not None
+        return known
+
+    def correct_results(self, results: list) -> Tuple[List[str], Dict[str, int]]:
+        """Corrects every line of an OCRProcessor.extract_text result list.
+
+        Returns:
+            tuple: The corrected lines in OCR order, and a count per corrected item
+            name in order of first appearance. Lines that are empty after
+            preprocessing are kept in the lines but not counted.
+        """
+        lines = self.correct_terms([result[1] for result in results])
+        counts: Dict[str, int] = {}
+        for line in lines:
+            if line:
+                counts[line] = counts.get(line, 0) + 1
+        logging.debug(f"Corrected {len(lines)} lines into {len(counts)} items")
+        return lines, counts
+
+    @staticmethod
+    def item_cells(results: list, lines: List[str]) -> Dict[str, List[dict]]:
+        """Grid cells per corrected item name, in reading order.
+
+        Only results read by OCRProcessor.recognize_cells() carry a cell; for any
+        other results this is empty. lines are correct_results()' lines for results.
+        """
+        cells: Dict[str, List[dict]] = {}
+        for result, line in zip(results, lines):
+            if line and len(result) > 3 and result[3]:
+                cells.setdefault(line, []).append(result[3])
+        return cells
+
+    @staticmethod
+    def cell_labels(cells: Optional[List[dict]]) -> str:
+        """Spreadsheet-style 1-based grid positions, e.g. "R1C3 R2C5"."""
+        return " ".join(f"R{cell['row'] + 1}C{cell['col'] + 1}" for cell in cells or ())
+
+    def clear(self):
+        """Drops all memoized corrections, e.g. after the rules or the index change."""
+        with self.lock:
+            self.memo.clear()
+
+    def cache_info(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self.memo), "max_size": self.memo_size}
@@ -2,9 +2,15 @@
 from enum import Enum
 
 class AppState(Enum):
+    WARMING_UP = "Warming up..."
     READY = "Ready"
     LOADING = "Loading..."
     PROCESSING = "Processing..."
     SEARCHING = "Searching Tarkov.dev..."
     COMPLETED = "Completed"
     ERROR = "Error"
+
+class CacheState(Enum):
+    FRESH = "fresh"
+    STALE = "stale"
+    MISS = "miss"
@@ -0,0 +1,216 @@
+# history.py
+"""Append-only history of every priced screenshot, queryable across sessions.
+
+Each screenshot gets one row (content hash, source, time, stage timings, item count and
+total value) and each detected item one row (name, count, price at ingest time). A
+session is one run of the GUI or of a headless command. record() only queues; a
+background thread commits the queue in one transaction at most every
+Config.HISTORY_FLUSH_INTERVAL seconds, so pricing never waits on the disk.
+
+The indexes cover the queries below: session totals read only the screenshots index,
+and an item's price history is one range scan of the items index.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+from settings import Config
+from utils import resource_path, connect_sqlite
+from metrics import metrics
+
+_STOP = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS screenshots (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    content_hash TEXT NOT NULL,
+    source TEXT,
+    ingested_at REAL NOT NULL,
+    timings TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    total_value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    screenshot_id INTEGER NOT NULL REFERENCES screenshots (id),
+    session_id INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    matched_name TEXT,
+    count INTEGER NOT NULL,
+    price INTEGER
+);
+CREATE INDEX IF NOT EXISTS screenshots_session ON screenshots (session_id, item_count, total_value);
+CREATE INDEX IF NOT EXISTS screenshots_time ON screenshots (ingested_at);
+CREATE INDEX IF NOT EXISTS screenshots_hash ON screenshots (content_hash);
+CREATE INDEX IF NOT EXISTS items_name_time ON items (name, ingested_at, price, count, session_id);
+CREATE INDEX IF NOT EXISTS items_time ON items (ingested_at);
+"""
+
+class HistoryStore:
+    """SQLite (WAL) history store with a batched background writer."""
+
+    def __init__(self, path: str = Config.HISTORY_FILE, kind: str = "gui",
+                 flush_interval: float = Config.HISTORY_FLUSH_INTERVAL, batch_size: int = Config.HISTORY_BATCH_SIZE):
+        self.kind = kind
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.started = time.time()
+        self.session_id: Optional[int] = None
+        self.lock = threading.Lock()
+        self.queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.writer: Optional[threading.Thread] = None
+        self.closed = False
+        self.written = 0
+        db_path = path if path == ":memory:" else resource_path(path)
+        self.conn = connect_sqlite(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def record(self, content_hash: str, source: Optional[str], counts: Dict[str, int], items_data: dict,
+               timings: Dict[str, float]):
+        """Queues one priced screenshot.
+
+        Args:
+            content_hash (str): Hash of the file bytes, or of the decoded pixels for images without a file.
+            source (str): File path, or where the image came from, e.g. "clipboard".
+            counts (dict): Corrected item name -> count, as from TermCorrector.correct_results().
+            items_data (dict): TarkovAPI.get_items_data() results; an item's first match gives its price.
+            timings (dict): Stage -> seconds.
+        """
+        if self.closed:
+            return
+        items = []
+        for name, count in counts.items():
+            matches = items_data.get(name.strip())
+            match = matches[0] if matches else None
+            items.append((name.strip(), match["name"] if match else None, count,
+                          match.get("avg24hPrice") if match else None))
+        self.queue.put((content_hash, source, time.time(), json.dumps(timings), items))
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    self.writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                    self.writer.start()
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            record = self.queue.get()
+            if record is _STOP:
+                break
+            records = [record]
+            # Everything arriving within the flush interval goes into the same transaction.
+            deadline = time.monotonic() + self.flush_interval
+            while len(records) < self.batch_size:
+                try:
+                    record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                records.append(record)
+            self._flush(records)
+
+    def _flush(self, records: List[tuple]):
+        with self.lock, metrics.span("history.flush"):
+            try:
+                self.conn.execute("BEGIN")
+                if self.session_id is None:
+                    self.session_id = self.conn.execute(
+                        "INSERT INTO sessions (kind, started_at, ended_at) VALUES (?, ?, ?)",
+                        (self.kind, self.started, self.started)).lastrowid
+                for content_hash, source, ingested_at, timings, items in records:
+                    total = sum(count * price for _, _, count, price in items if price)
+                    screenshot_id = self.conn.execute(
+                        "INSERT INTO screenshots (session_id, content_hash, source, ingested_at, timings, "
+                        "item_count, total_value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (self.session_id, content_hash, source, ingested_at, timings,
+                         sum(count for _, _, count, _ in items), total)).lastrowid
+                    self.conn.executemany(
+                        "INSERT INTO items (screenshot_id, session_id, ingested_at, name, matched_name, count, price) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(screenshot_id, self.session_id, ingested_at, *item) for item in items])
+                self.conn.execute("UPDATE sessions SET ended_at = ? WHERE id = ?", (records[-1][2], self.session_id))
+                self.conn.execute("COMMIT")
+                self.written += len(records)
+                metrics.count("history.screenshots", len(records))
+            except sqlite3.Error as e:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                logging.error(f"Error writing {len(records)} screenshots to history: {e}", exc_info=True)
+
+    def close(self, timeout: float = 10.0):
+        """Commits whatever is still queued and stops the writer."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer is not None:
+            self.queue.put(_STOP)
+            self.writer.join(timeout)
+
+    def sessions(self, limit: int = 20) -> List[dict]:
+        """The latest sessions with their screenshot count, item count and total value, newest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT s.id, s.kind, s.started_at, s.ended_at, COUNT(sc.session_id), "
+                "COALESCE(SUM(sc.item_count), 0), COALESCE(SUM(sc.total_value), 0) "
+                "FROM sessions s LEFT JOIN screenshots sc ON sc.session_id = s.id "
+                "GROUP BY s.id ORDER BY s.id DESC LIMIT ?", (limit,)).fetchall()
+        return [{"session": row[0], "kind": row[1], "started_at": row[2], "ended_at": row[3],
+                 "screenshots": row[4], "items": row[5], "total_value": row[6]} for row in rows]
+
+    def price_history(self, name: str, since: Optional[float] = None, limit: Optional[int] = None) -> List[dict]:
+        """Every recorded price of an item (case-insensitive), oldest first, or the latest limit of them."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT ingested_at, price, count, session_id FROM items "
+                "WHERE name = ? AND ingested_at >= ? ORDER BY ingested_at DESC LIMIT ?",
+                (name, since or 0.0, limit if limit else -1)).fetchall()
+        return [{"ingested_at": row[0], "price": row[1], "count": row[2], "session": row[3]} for row in reversed(rows)]
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+def print_sessions(limit: int = 20, as_json: bool = False, path: str = Config.HISTORY_FILE):
+    """Prints the total value per session."""
+    store = HistoryStore(path)
+    rows = store.sessions(limit)
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'session':>7}  {'kind':<6} {'started':<19}  {'duration':>9} {'shots':>6} {'items':>7} {'total value':>13}")
+    for row in rows:
+        print(f"{row['session']:>7}  {row['kind']:<6} {_format_time(row['started_at'])}  "
+              f"{row['ended_at'] - row['started_at']:>8.0f}s {row['screenshots']:>6} {row['items']:>7} "
+              f"{row['total_value']:>13,}")
+
+def print_price_history(name: str, days: Optional[float] = None, limit: Optional[int] = None,
+                        as_json: bool = False, path: str = Config.HISTORY_FILE):
+    """Prints the price of an item at every ingest, with a min/max/last summary."""
+    store = HistoryStore(path)
+    since = time.time() - days * 86400 if days else None
+    rows = store.price_history(name, since, limit)
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"No history for {name!r}", file=sys.stderr)
+        return
+    for row in rows:
+        price = "-" if row["price"] is None else f"{row['price']:,}"
+        print(f"{_format_time(row['ingested_at'])}  {price:>12}  x{row['count']:<4} session {row['session']}")
+    prices = [row["price"] for row in rows if row["price"] is not None]
+    if prices:
+        print(f"{len(rows)} sightings; min {min(prices):,}, max {max(prices):,}, last {prices[-1]:,}")
@@ -1,50 +1,167 @@
 # image_processing.py
+import dataclasses
 import logging
 import cv2
-from PIL import Image, ImageTk, UnidentifiedImageError
-from typing import Optional
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+from typing import List, Optional, Tuple
 from settings import Config
+from utils import to_pixels
 from enums import AppState
+from metrics import metrics
+
+try:
+    from PIL import ImageTk
+except ImportError:  # No tkinter, e.g. OCR workers on a headless server; only display needs it
+    ImageTk = None
+
+@dataclasses.dataclass(frozen=True)
+class GridCell:
+    """One item on a stash/inventory grid: its pixel rectangle and its position in grid units."""
+    x: int
+    y: int
+    width: int
+    height: int
+    row: int
+    col: int
+    rows: int = 1
+    cols: int = 1
+
+    def label_box(self, cell_size: int) -> List[int]:
+        """The short-name strip along the top of the item, as easyocr's [x_min, x_max, y_min, y_max]."""
+        inset = Config.GRID_LABEL_INSET
+        label_height = max(8, round(cell_size * Config.GRID_LABEL_HEIGHT))
+        return [self.x + inset, self.x + self.width - inset,
+                self.y + inset, self.y + min(self.height, inset + label_height)]
+
+    def as_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+def _cluster_starts(values: np.ndarray, tolerance: int) -> np.ndarray:
+    """Collapses sorted coordinates that lie within tolerance of each other into their first value."""
+    values = np.sort(values)
+    keep = np.concatenate(([True], np.diff(values) > tolerance))
+    return values[keep]
+
+@metrics.timed("image.detect_grid")
+def detect_grid(pixels: np.ndarray) -> Tuple[List[GridCell], int]:
+    """Finds the item rectangles of a stash or inventory grid.
+
+    Grid lines are the long straight runs in an edge map. The regions they enclose
+    are items: one unit cell, or a whole number of cells for larger items. A
+    screenshot counts as a grid only if enough regions share a cell size.
+
+    Returns:
+        tuple: The cells in reading order and the unit cell size in pixels, or
+        ([], 0) when no grid is found.
+    """
+    grey = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY) if pixels.ndim == 3 else pixels
+    min_cell, max_cell = Config.GRID_MIN_CELL_SIZE, Config.GRID_MAX_CELL_SIZE
+    edges = cv2.Canny(grey, 40, 120)
+    horizontal = cv2.morphologyEx(edges, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (min_cell, 1)))
+    vertical = cv2.morphologyEx(edges, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, min_cell)))
+    lines = cv2.dilate(cv2.bitwise_or(horizontal, vertical), np.ones((3, 3), np.uint8))
+    # Opening with a square keeps rectangles intact but drops the specks where double grid lines
+    # cross, which would otherwise join neighbouring cells diagonally.
+    speck = max(3, min_cell // 4) | 1
+    regions_mask = cv2.morphologyEx(cv2.bitwise_not(lines), cv2.MORPH_OPEN, np.ones((speck, speck), np.uint8))
+    contours, hierarchy = cv2.findContours(regions_mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+
+    candidates = []
+    for contour, (_, _, _, parent) in zip(contours, hierarchy[0] if hierarchy is not None else []):
+        if parent != -1:  # A hole's boundary, not a region's
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        # Items are nearly full rectangles once their icon's outlines are ignored; the background is not.
+        if min_cell <= min(w, h) and max(w, h) <= max_cell * Config.GRID_MAX_ITEM_CELLS \
+                and cv2.contourArea(contour) >= 0.85 * w * h:
+            candidates.append((x, y, w, h))
+    if not candidates:
+        return [], 0
+    # Shapes inside an icon can enclose rectangles of their own; keep only the outermost ones.
+    rects = np.array(candidates)
+    x, y, right, bottom = rects[:, 0], rects[:, 1], rects[:, 0] + rects[:, 2], rects[:, 1] + rects[:, 3]
+    inside = ((x[:, None] >= x[None, :]) & (y[:, None] >= y[None, :])
+              & (right[:, None] <= right[None, :]) & (bottom[:, None] <= bottom[None, :]))
+    np.fill_diagonal(inside, False)
+    regions = [candidates[i] for i in np.flatnonzero(~inside.any(axis=1))]
+    if len(regions) < Config.GRID_MIN_CELLS:
+        return [], 0
+
+    unit = int(np.median([min(w, h) for _, _, w, h in regions]))
+    if not min_cell <= unit <= max_cell:
+        return [], 0
+    # The pitch adds the grid line width to the unit cell; measure it between neighbouring cells.
+    steps = np.concatenate([np.diff(_cluster_starts(np.array([r[axis] for r in regions]), 2)) for axis in (0, 1)])
+    steps = steps[(steps >= unit) & (steps <= 1.5 * unit)]
+    pitch = float(np.median(steps)) if len(steps) else float(unit + 2)
+    gap = pitch - unit
+
+    sized = []
+    for x, y, w, h in regions:
+        cols, rows = (w + gap) / pitch, (h + gap) / pitch
+        if abs(cols - round(cols)) <= 0.2 and abs(rows - round(rows)) <= 0.2:
+            sized.append((x, y, w, h, max(1, round(rows)), max(1, round(cols))))
+    if len(sized) < Config.GRID_MIN_CELLS:
+        return [], 0
+
+    x0 = min(x for x, *_ in sized)
+    y0 = min(y for _, y, *_ in sized)
+    cells = [GridCell(x, y, w, h, round((y - y0) / pitch), round((x - x0) / pitch), rows, cols)
+             for x, y, w, h, rows, cols in sized]
+    cells.sort(key=lambda cell: (cell.row, cell.col))
+    logging.debug(f"Detected {len(cells)} grid items, cell size {unit}px, pitch {pitch:.1f}px")
+    return cells, unit
+
+def thumbnail_size(size: Tuple[int, int], max_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Scales size down to fit max_size, keeping the aspect ratio; never scales up."""
+    width, height = size
+    scale = min(1.0, max_size[0] / width, max_size[1] / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
 
 class ImageDisplay:
     def __init__(self, image_label, set_status_callback):
         self.image_label = image_label
         self.set_status = set_status_callback
-        self.img: Optional[Image.Image] = None  # Original image for both display and OCR
+        self.img: Optional[Image.Image] = None  # Display thumbnail
+        self.pixels: Optional[np.ndarray] = None  # Full-resolution RGB pixels for OCR
         self.tk_img: Optional[ImageTk.PhotoImage] = None
 
     def process_and_display_image(self, img: Image.Image) -> bool:
-        """Processes and displays the original image in the image_label widget."""
+        """Displays a thumbnail of the image in the image_label widget, leaving img untouched."""
         try:
-            img.thumbnail((Config.DEFAULT_IMAGE_WIDTH, Config.DEFAULT_IMAGE_HEIGHT))
-            self.tk_img = ImageTk.PhotoImage(img)
+            size = thumbnail_size(img.size, (Config.DEFAULT_IMAGE_WIDTH, Config.DEFAULT_IMAGE_HEIGHT))
+            thumbnail = img if size == img.size else img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+            self.tk_img = ImageTk.PhotoImage(thumbnail)
             self.image_label.config(image=self.tk_img)
             self.image_label.image = self.tk_img
-            self.img = img
+            self.img = thumbnail
             return True
         except Exception as e:
             logging.error(f"Error processing/displaying image: {e}", exc_info=True)
             self.set_status(AppState.ERROR, "Error processing/displaying image.")
             return False
 
+    @metrics.timed("image.load")
     def load_and_process_image(self, image_source, filename: Optional[str] = None) -> bool:
-        """Loads an image for display and OCR without preprocessing."""
+        """Decodes an image once, keeping its full-resolution pixels for OCR and a thumbnail for display."""
         try:
             if isinstance(image_source, str):
                 img = Image.open(image_source)
-                if cv2.imread(image_source) is None:  # Basic validation
-                    raise ValueError(f"OpenCV could not load image: {image_source}")
+                img.load()  # Decodes now, so truncated or corrupt files fail here
             elif isinstance(image_source, Image.Image):
                 img = image_source
             else:
                 raise ValueError("Unsupported image source type")
 
+            pixels = to_pixels(img)
             if self.process_and_display_image(img):
+                self.pixels = pixels
                 self.set_status(AppState.READY, f"Image loaded: {filename or 'Clipboard Image'}")
                 return True
             return False
 
-        except (FileNotFoundError, UnidentifiedImageError, ValueError) as e:
+        except (OSError, UnidentifiedImageError, ValueError) as e:
             self.set_status(AppState.ERROR, f"Error loading image: {e}")
             logging.error(f"Error loading image: {e}", exc_info=True)
             return False
@@ -54,4 +171,5 @@ class ImageDisplay:
         self.image_label.config(image=None)
         self.image_label.image = None
         self.img = None
-        self.tk_img = None
\ No newline at end of file
+        self.pixels = None
+        self.tk_img = None
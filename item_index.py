@@ -0,0 +1,125 @@
+# item_index.py
+import logging
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+from rapidfuzz import fuzz, process
+from settings import Config
+from utils import normalize_term
+
+class ItemNameIndex:
+    """Fuzzy-matchable index of every item name and shortName in the catalogue.
+
+    Items are deduplicated by id and stored in parallel arrays. Matching runs
+    against the pre-normalized keys, so no per-call preprocessing of the
+    catalogue is needed.
+    """
+
+    def __init__(self, ids: Sequence[str], names: Sequence[str], short_names: Sequence[str],
+                 score_cutoff: int = Config.FUZZY_MATCH_THRESHOLD,
+                 keys: Optional[List[str]] = None, key_items: Optional[Sequence[int]] = None):
+        """keys and key_items, if given, are the precomputed match keys (see catalogue.py).
+
+        ids, names and short_names only need indexing and len(), so they can be views
+        into a compiled catalogue.
+        """
+        self.ids = ids
+        self.names = names
+        self.short_names = short_names
+        self.score_cutoff = score_cutoff
+
+        if keys is None:
+            # One match key per name and per distinct shortName, each pointing back at its item.
+            keys = []
+            key_items = []
+            for idx, (name, short_name) in enumerate(zip(names, short_names)):
+                name_key = normalize_term(name)
+                short_key = normalize_term(short_name)
+                keys.append(name_key)
+                key_items.append(idx)
+                if short_key and short_key != name_key:
+                    keys.append(short_key)
+                    key_items.append(idx)
+        self.keys = keys
+        self.key_items = np.asarray(key_items, dtype=np.int32)
+
+        # Exact hits skip fuzzy scoring entirely; the first item for a key wins.
+        self.exact = {}
+        for key, idx in zip(keys, self.key_items.tolist()):
+            self.exact.setdefault(key, idx)
+        logging.info(f"Item name index built: {len(self.names)} items, {len(self.keys)} keys")
+
+    @classmethod
+    def from_lookup(cls, lookup: dict, score_cutoff: int = Config.FUZZY_MATCH_THRESHOLD) -> "ItemNameIndex":
+        """Builds the index from the category -> items mapping of load_item_name_lookup()."""
+        ids, names, short_names = [], [], []
+        seen = set()
+        for items in lookup.values():
+            for item in items:
+                item_id = item.get("id")
+                name = item.get("name")
+                if not name or item_id in seen:
+                    continue
+                seen.add(item_id)
+                ids.append(item_id)
+                names.append(name)
+                short_names.append(item.get("shortName") or "")
+        return cls(ids, names, short_names, score_cutoff)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def match(self, term: str) -> Optional[int]:
+        """Returns the item index that best matches term, or None below the score cutoff."""
+        return self.match_many([term])[0]
+
+    def match_many(self, terms: Iterable[str]) -> List[Optional[int]]:
+        """Matches many terms, scoring all of them against the catalogue in one vectorized pass.
+
+        Exact key hits are resolved first; terms shorter than Config.FUZZY_MIN_LENGTH only
+        match exactly. The remaining terms are scored with the cheap whole-string QRatio
+        in a single cdist call spread over all CPU cores; only terms that still have no
+        match fall back to the costlier WRatio, which also considers partial matches such
+        as "tnt brick" inside "tp-200 tnt brick".
+
+        Partial matching finds some item for almost any text, so it is reserved for
+        multi-word terms of Config.FUZZY_PARTIAL_MIN_LENGTH or more characters, needs
+        Config.FUZZY_PARTIAL_THRESHOLD, and ignores keys much shorter or longer than the
+        term. Short or generic lines such as "x", "ak" or "Found in raid" stay unmatched.
+        """
+        queries = [normalize_term(term) for term in terms]
+        matches: List[Optional[int]] = [self.exact.get(key) for key in queries]
+        pending = [i for i, key in enumerate(queries) if matches[i] is None and len(key) >= Config.FUZZY_MIN_LENGTH]
+        if not pending or not self.keys:
+            return matches
+
+        scores = process.cdist([queries[i] for i in pending], self.keys, scorer=fuzz.QRatio,
+                               processor=None, score_cutoff=self.score_cutoff,
+                               dtype=np.uint8, workers=-1)
+        best = scores.argmax(axis=1)
+        for row, i in enumerate(pending):
+            # cdist zeroes scores below the cutoff, so a zero maximum means no match.
+            if scores[row, best[row]] > 0:
+                matches[i] = int(self.key_items[best[row]])
+
+        for i in pending:
+            if matches[i] is None and self._partial_candidate(queries[i]):
+                matches[i] = self._partial_match(queries[i])
+        return matches
+
+    @staticmethod
+    def _partial_candidate(query: str) -> bool:
+        return len(query) >= Config.FUZZY_PARTIAL_MIN_LENGTH and len(query.split()) >= Config.FUZZY_PARTIAL_MIN_TOKENS
+
+    def _partial_match(self, query: str) -> Optional[int]:
+        """The best WRatio match whose key is of comparable length to query, if any."""
+        results = process.extract(query, self.keys, scorer=fuzz.WRatio, processor=None,
+                                  score_cutoff=max(self.score_cutoff, Config.FUZZY_PARTIAL_THRESHOLD), limit=None)
+        for key, _, position in results:
+            if min(len(key), len(query)) / max(len(key), len(query)) >= Config.FUZZY_PARTIAL_MIN_LENGTH_RATIO:
+                return int(self.key_items[position])
+        return None
+
+    def best_name(self, term: str) -> Optional[str]:
+        """Returns the full item name that best matches term, if any."""
+        idx = self.match(term)
+        return self.names[idx] if idx is not None else None
@@ -1,9 +1,16 @@
 # main.py
+# Created before the other imports so that --profile-startup covers them.
+from startup import StartupProfile
+_startup = StartupProfile()
+
+import argparse
+import importlib.util
 import logging
 import logging.handlers
+import multiprocessing
 import sys
-from ui import ScreenshotIngestorApp
 from settings import Config
+from metrics import metrics
 
 def setup_logging():
     """Sets up the logging configuration."""
@@ -18,19 +25,140 @@ def setup_logging():
     logging.getLogger('').addHandler(handler)
     logging.info("Application started.")
 
-if __name__ == "__main__":
-    setup_logging()
-    
-    try:
-        import easyocr
-    except ImportError as e:
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Screenshot Ingestor")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import/initialization timing breakdown once the GUI is ready")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Record per-stage timings and write them on exit (.prom/.txt: Prometheus text, else JSON)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="Price every screenshot in a directory without the GUI")
+    batch_parser.add_argument("directory", help="Directory to scan recursively for screenshots")
+    batch_parser.add_argument("-o", "--output", default="-", help="Output file, '-' for stdout (default)")
+    batch_parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl")
+    batch_parser.add_argument("-w", "--workers", type=int, default=Config.BATCH_WORKERS,
+                              help="Number of OCR worker processes")
+    add_gpu_arguments(batch_parser)
+
+    watch_parser = subparsers.add_parser("watch", help="Watch a directory and price new screenshots as they appear")
+    watch_parser.add_argument("directory", help="Directory to watch recursively")
+    watch_parser.add_argument("-o", "--output", default="-", help="Output file to append to, '-' for stdout (default)")
+    watch_parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl")
+    add_gpu_arguments(watch_parser)
+
+    live_parser = subparsers.add_parser("live", help="Capture the screen continuously and print prices as they change")
+    live_parser.add_argument("--region", default="", help="left,top,width,height to capture (default: capture_region from the settings file)")
+    live_parser.add_argument("--fps", type=float, default=None, help="Frames captured per second")
+    add_gpu_arguments(live_parser)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve screenshot pricing over local HTTP for other tools")
+    serve_parser.add_argument("--host", default=Config.SERVE_HOST)
+    serve_parser.add_argument("--port", type=int, default=Config.SERVE_PORT)
+    serve_parser.add_argument("--max-pending", type=int, default=Config.SERVE_MAX_PENDING,
+                              help="Requests in flight before new ones get 429")
+    serve_parser.add_argument("--batch-window", type=float, default=Config.SERVE_BATCH_WINDOW,
+                              help="Seconds the OCR worker waits to batch concurrent requests")
+    add_gpu_arguments(serve_parser)
+
+    history_parser = subparsers.add_parser("history", help=f"Query the price history in {Config.HISTORY_FILE}")
+    history_parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    history_commands = history_parser.add_subparsers(dest="history_command", required=True)
+    sessions_parser = history_commands.add_parser("sessions", help="Total value per session, newest first")
+    sessions_parser.add_argument("-n", "--limit", type=int, default=20)
+    item_parser = history_commands.add_parser("item", help="An item's price at every ingest")
+    item_parser.add_argument("name", help="Corrected item name, case-insensitive")
+    item_parser.add_argument("--days", type=float, default=None, help="Only the last N days")
+    item_parser.add_argument("-n", "--limit", type=int, default=None, help="Only the latest N sightings")
+
+    subparsers.add_parser("catalogue", help=f"Compile {Config.ITEM_NAMES_FILE} into {Config.ITEM_CATALOGUE_FILE} "
+                                            "for fast startup")
+    return parser.parse_args(argv)
+
+def add_gpu_arguments(parser):
+    gpu_group = parser.add_mutually_exclusive_group()
+    gpu_group.add_argument("--gpu", dest="use_gpu", action="store_true", default=None)
+    gpu_group.add_argument("--cpu", dest="use_gpu", action="store_false")
+
+def run_gui(profile_startup: bool = False):
+    # Only check that easyocr is installed: importing it pulls in torch, which the OCR workers load instead.
+    if importlib.util.find_spec("easyocr") is None:
         import tkinter as tk
+        from tkinter import messagebox
         root = tk.Tk()
         root.withdraw()
-        tk.messagebox.showerror("Error",
-                               f"EasyOCR is not installed. Please install it by running: pip install easyocr\nOriginal Error: {e}")
-        logging.critical("EasyOCR not installed. Application exiting.", exc_info=True)
+        messagebox.showerror("Error",
+                             "EasyOCR is not installed. Please install it by running: pip install easyocr")
+        logging.critical("EasyOCR not installed. Application exiting.")
         sys.exit(1)
 
-    app = ScreenshotIngestorApp()
-    app.run()
\ No newline at end of file
+    _startup.enabled = profile_startup
+    with _startup.span("import ui"):
+        from ui import ScreenshotIngestorApp
+    app = ScreenshotIngestorApp(_startup)
+    app.run()
+
+def require_easyocr_cli():
+    if importlib.util.find_spec("easyocr") is None:
+        print("EasyOCR is not installed. Please install it by running: pip install easyocr", file=sys.stderr)
+        logging.critical("EasyOCR not installed. Application exiting.")
+        sys.exit(1)
+
+def run_batch_command(args):
+    require_easyocr_cli()
+    from batch import run_batch
+    run_batch(args.directory, args.output, args.format, args.workers, args.use_gpu)
+
+def run_watch_command(args):
+    require_easyocr_cli()
+    from watcher import WatchDaemon
+    WatchDaemon(args.directory, args.output, args.format, args.use_gpu).run()
+
+def run_live_command(args):
+    require_easyocr_cli()
+    from capture import run_live
+    run_live(args.region, args.fps, args.use_gpu)
+
+def run_serve_command(args):
+    require_easyocr_cli()
+    from server import run_serve
+    run_serve(args.host, args.port, args.use_gpu, args.max_pending, args.batch_window)
+
+def run_history_command(args):
+    from history import print_sessions, print_price_history
+    if args.history_command == "sessions":
+        print_sessions(args.limit, args.json)
+    else:
+        print_price_history(args.name, args.days, args.limit, args.json)
+
+def run_catalogue_command(args):
+    from catalogue import compile_catalogue
+    print(f"Wrote {compile_catalogue()}")
+
+if __name__ == "__main__":
+    # In a frozen build, spawned OCR workers re-run this executable; this hands them to multiprocessing.
+    multiprocessing.freeze_support()
+    with _startup.span("setup logging"):
+        setup_logging()
+    args = parse_args()
+    metrics.enabled = bool(args.metrics)
+
+    try:
+        if args.command == "batch":
+            run_batch_command(args)
+        elif args.command == "watch":
+            run_watch_command(args)
+        elif args.command == "live":
+            run_live_command(args)
+        elif args.command == "serve":
+            run_serve_command(args)
+        elif args.command == "history":
+            run_history_command(args)
+        elif args.command == "catalogue":
+            run_catalogue_command(args)
+        else:
+            run_gui(args.profile_startup)
+    finally:
+        if args.metrics:
+            metrics.export(args.metrics)
+            logging.info(f"Metrics written to {args.metrics}")
@@ -1,41 +1,390 @@
 # ocr.py
 import easyocr
+from easyocr.utils import reformat_input
+import cv2
 from PIL import Image
-from io import BytesIO
+import inspect
+import json
 import logging
+import time
+from typing import Dict, List, Optional, Union
+import numpy as np
+from ocr_cache import OCRCache
+from utils import to_pixels
+from image_processing import GridCell, detect_grid
+from settings import Config
+from metrics import metrics
+
+def profile_params(profile: str) -> dict:
+    """readtext() keyword arguments of an OCR profile; "default" keeps easyocr's defaults.
+
+    "fast_cpu" is experimental: it restricts recognition to the characters item names
+    use, caps the detector's input at Config.OCR_FAST_CANVAS_SIZE, and loosens the
+    detection thresholds for the game's small, high-contrast label font. On the
+    synthetic benchmark set it cuts OCR p50 by about 60%, but its thresholds are not
+    tuned and its accuracy against real screenshots has not been measured.
+    """
+    if profile != "fast_cpu":
+        return {}
+    from catalogue import item_charset
+    params = {
+        "canvas_size": Config.OCR_FAST_CANVAS_SIZE,
+        "text_threshold": Config.OCR_FAST_TEXT_THRESHOLD,
+        "low_text": Config.OCR_FAST_LOW_TEXT,
+        "link_threshold": Config.OCR_FAST_LINK_THRESHOLD,
+        "width_ths": Config.OCR_FAST_WIDTH_THS,
+    }
+    charset = item_charset()
+    if charset:
+        params["allowlist"] = charset
+    return params
+
+def enhance_crop(grey: np.ndarray) -> List[np.ndarray]:
+    """Re-recognition variants of a greyscale text crop: contrast-equalized and binarized.
+
+    The crop is first upscaled so its text is about Config.OCR_REFINE_TEXT_HEIGHT pixels
+    tall, since small labels lose most to the recognizer's resize to 64 pixels.
+    """
+    scale = min(max(Config.OCR_REFINE_TEXT_HEIGHT / max(grey.shape[0], 1), 1.0), Config.OCR_REFINE_MAX_SCALE)
+    upscaled = cv2.resize(grey, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    equalized = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(2, 8)).apply(upscaled)
+    _, binary = cv2.threshold(equalized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return [equalized, binary]
+
+def _stack(crops: List[np.ndarray], gap: int = 8) -> tuple:
+    """Stacks crops top to bottom into one image; returns it and each crop's [x_min, x_max, y_min, y_max]."""
+    width = max(crop.shape[1] for crop in crops) + 2 * gap
+    height = sum(crop.shape[0] + gap for crop in crops) + gap
+    mosaic = np.empty((height, width), dtype=np.uint8)
+    boxes = []
+    y = gap
+    for crop in crops:
+        h, w = crop.shape
+        # Pad with each crop's own background so no edges appear between crops.
+        mosaic[y - gap:y + h, :] = int(np.median(crop))
+        mosaic[y:y + h, gap:gap + w] = crop
+        boxes.append([gap, gap + w, y, y + h])
+        y += h + gap
+    mosaic[y - gap:, :] = mosaic[y - gap - 1, 0]
+    return mosaic, boxes
 
 class OCRProcessor:
-    def __init__(self, use_gpu: bool = True):
+    def __init__(self, use_gpu: bool = True, cache: Optional[OCRCache] = None, use_cache: bool = True,
+                 profile: str = "default", quantize: bool = True, torch_threads: int = 0, refine: bool = False,
+                 reader: Optional[easyocr.Reader] = None):
         """
         Initialize the OCR processor with optional GPU support.
-        
+
         Args:
             use_gpu (bool): Whether to use GPU for OCR processing. Defaults to True.
+            cache (OCRCache, optional): Result cache to use. A default one is opened if not given.
+            use_cache (bool): Whether to cache results by image content. Defaults to True.
+            profile (str): A settings.OCR_PROFILES key, see profile_params().
+            quantize (bool): Whether easyocr dynamically quantizes its models to int8 on CPU.
+            torch_threads (int): Torch intra-op threads; 0 leaves torch's default.
+            refine (bool): Whether to re-read doubtful text in a second pass by default, see
+                refine(). extract_text_batch() and extract_cells() can override it per call.
+            reader (easyocr.Reader, optional): A reader to use instead of loading the models,
+                e.g. the random-weight one of benchmarks.bench_ocr_profile.
         """
-        self.reader = easyocr.Reader(['en'], gpu=use_gpu)
-        logging.info(f"OCR reader initialized with GPU: {use_gpu}")
+        if torch_threads:
+            import torch
+            torch.set_num_threads(torch_threads)
+        self.languages = ['en']
+        self.use_gpu = use_gpu
+        self.profile = profile
+        self.quantize = quantize
+        self.reader = reader or easyocr.Reader(self.languages, gpu=use_gpu, quantize=quantize)
+        self.readtext_params = profile_params(profile)
+        self.refine_enabled = refine
+        self.term_checker = None
+        self.last_timings: List[Dict[str, float]] = []
+        self.cache = (cache or OCRCache()) if use_cache else None
+        if self.cache is not None:
+            self.cache.invalidate(self.model_signature())
+        logging.info(f"OCR reader initialized with GPU: {use_gpu}, profile: {profile}, quantize: {quantize}")
+
+    def model_signature(self) -> str:
+        """Identifies the models in use; cached results from any other models are stale."""
+        return json.dumps({
+            "easyocr": easyocr.__version__,
+            "languages": self.languages,
+            "detector": getattr(self.reader, "detect_network", "craft"),
+            "recognizer": getattr(self.reader, "model_lang", None),
+        }, sort_keys=True)
 
-    def extract_text(self, image: Image.Image) -> list:
+    def settings_signature(self, grid: bool = False, refine: Optional[bool] = None) -> str:
+        """Identifies everything besides the pixels that can change the OCR output."""
+        refine = self.refine_enabled if refine is None else refine
+        return json.dumps({
+            "model": self.model_signature(),
+            "device": str(getattr(self.reader, "device", self.use_gpu)),
+            "params": self.readtext_params,
+            "quantize": self.quantize,
+            "refine": [Config.OCR_REFINE_CONFIDENCE, Config.OCR_REFINE_TEXT_HEIGHT] if refine else None,
+            "grid": [Config.GRID_LABEL_HEIGHT, Config.GRID_LABEL_INSET] if grid else None,
+        }, sort_keys=True)
+
+    @metrics.timed("ocr.extract_text")
+    def extract_text(self, image: Union[str, Image.Image, np.ndarray], grid: bool = False) -> list:
         """
-        Extracts text from an image.
+        Extracts text from an image, answering repeated images from the OCR cache.
 
         Args:
-            image (PIL.Image.Image): The image to process.
+            image: A file path, PIL image or RGB numpy array. Arrays are passed to
+                readtext as they are, without a file or JPEG round trip.
+            grid (bool): Read only the item labels of a stash/inventory grid, if one
+                is found. See recognize_cells().
 
         Returns:
-            list: List of OCR results (bbox, text, probability).
+            list: List of OCR results (bbox, text, probability), with a fourth cell
+            element for results read from a grid.
 
         Raises:
             Exception: If OCR processing fails.
         """
         try:
-            if hasattr(image, 'filename'):
-                results = self.reader.readtext(image.filename)
-            else:
-                buffered = BytesIO()
-                image.save(buffered, format="JPEG")
-                results = self.reader.readtext(buffered.getvalue())
+            start = time.perf_counter()
+            results = self.extract_text_batch([image], grid)[0]
+            logging.info(f"OCR took {(time.perf_counter() - start) * 1000:.1f} ms")
             return results
         except Exception as e:
             logging.error(f"Error during OCR: {e}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+
+    def extract_text_batch(self, images: List[Union[str, Image.Image, np.ndarray]], grid: bool = False,
+                           use_cache: bool = True, refine: Optional[bool] = None) -> List[list]:
+        """
+        Extracts text from several images, running same-sized ones through one readtext_batched call.
+
+        Args:
+            images (list): File paths, PIL images or RGB numpy arrays.
+            grid (bool): Read only the item labels of images that show a stash/inventory
+                grid. Images without a grid still go through full readtext.
+            use_cache (bool): Whether to look up and store these images in the OCR cache;
+                off for images that will not be seen again, such as live capture frames.
+            refine (bool, optional): Whether to run refine() on fresh results; None uses
+                the processor's default.
+
+        Returns:
+            list: One list of OCR results (bbox, text, probability) per image, in input order.
+            The seconds each image spent per stage are left in last_timings.
+        """
+        refine = self.refine_enabled if refine is None else refine
+        timings: List[Dict[str, float]] = [{} for _ in images]
+        start = time.perf_counter()
+        pixels = [to_pixels(image) for image in images]
+        for timing in timings:
+            timing["decode"] = (time.perf_counter() - start) / len(images)
+        outputs: List[Optional[list]] = [None] * len(pixels)
+        keys: List[Optional[str]] = [None] * len(pixels)
+        if self.cache is not None and use_cache:
+            signature = self.settings_signature(grid, refine)
+            for i, array in enumerate(pixels):
+                start = time.perf_counter()
+                keys[i] = self.cache.make_key(array, signature)
+                outputs[i] = self.cache.get(keys[i])
+                timings[i]["cache"] = time.perf_counter() - start
+
+        groups = {}
+        fresh = []
+        for i, array in enumerate(pixels):
+            if outputs[i] is not None:
+                continue
+            start = time.perf_counter()
+            cells, cell_size = detect_grid(array) if grid else ([], 0)
+            if grid:
+                timings[i]["grid"] = time.perf_counter() - start
+            if cells:
+                start = time.perf_counter()
+                outputs[i] = self.recognize_cells(array, cells, cell_size)
+                timings[i]["recognize"] = time.perf_counter() - start
+                fresh.append(i)
+            else:
+                groups.setdefault(array.shape, []).append(i)
+        for indices in groups.values():
+            if len(indices) == 1:
+                group_results = [self._readtext(pixels[indices[0]], timings[indices[0]])]
+            else:
+                start = time.perf_counter()
+                group_results = self.reader.readtext_batched([pixels[i] for i in indices], **self.readtext_params)
+                for i in indices:
+                    timings[i]["readtext_batched"] = (time.perf_counter() - start) / len(indices)
+            for i, results in zip(indices, group_results):
+                outputs[i] = results
+                fresh.append(i)
+        for i in fresh:
+            if refine:
+                start = time.perf_counter()
+                outputs[i] = self.refine(pixels[i], outputs[i])
+                timings[i]["refine"] = time.perf_counter() - start
+            if keys[i] is not None:
+                self.cache.put(keys[i], self.model_signature(), outputs[i])
+
+        self.last_timings = timings
+        for timing in timings:
+            for stage, seconds in timing.items():
+                metrics.observe(f"ocr.{stage}", seconds)
+        return outputs
+
+    def extract_cells(self, image: Union[str, Image.Image, np.ndarray], cells: List[GridCell],
+                      cell_size: int, refine: Optional[bool] = None) -> list:
+        """
+        Reads the labels of known grid cells only, without grid detection or the OCR cache.
+
+        For callers that already ran detect_grid() and only need some of the cells read
+        again, e.g. the cells of a live capture frame that changed.
+
+        Returns:
+            list: recognize_cells() results. The seconds per stage are left in last_timings.
+        """
+        timing: Dict[str, float] = {}
+        start = time.perf_counter()
+        pixels = to_pixels(image)
+        timing["decode"] = time.perf_counter() - start
+        start = time.perf_counter()
+        results = self.recognize_cells(pixels, cells, cell_size) if cells else []
+        timing["recognize"] = time.perf_counter() - start
+        if (self.refine_enabled if refine is None else refine) and results:
+            start = time.perf_counter()
+            results = self.refine(pixels, results)
+            timing["refine"] = time.perf_counter() - start
+        self.last_timings = [timing]
+        for stage, seconds in timing.items():
+            metrics.observe(f"ocr.{stage}", seconds)
+        return results
+
+    def _params_for(self, method) -> dict:
+        """The readtext_params that method (reader.detect or reader.recognize) accepts."""
+        names = inspect.signature(method).parameters
+        return {k: v for k, v in self.readtext_params.items() if k in names}
+
+    def _readtext(self, pixels: np.ndarray, timing: Dict[str, float]) -> list:
+        """reader.readtext(), run as its detection and recognition halves so each can be timed."""
+        start = time.perf_counter()
+        img, img_cv_grey = reformat_input(pixels)
+        horizontal_list, free_list = self.reader.detect(img, reformat=False, **self._params_for(self.reader.detect))
+        detected = time.perf_counter()
+        results = self.reader.recognize(img_cv_grey, horizontal_list[0], free_list[0], reformat=False,
+                                        **self._params_for(self.reader.recognize))
+        timing["detect"] = detected - start
+        timing["recognize"] = time.perf_counter() - detected
+        return results
+
+    def recognize_cells(self, pixels: np.ndarray, cells: List[GridCell], cell_size: int) -> list:
+        """
+        Reads the label strip of every grid cell in one recognizer call, skipping text detection.
+
+        Args:
+            pixels (np.ndarray): The RGB screenshot the cells were detected in.
+            cells (list): GridCells from image_processing.detect_grid().
+            cell_size (int): The grid's unit cell size in pixels.
+
+        Returns:
+            list: (bbox, text, probability, cell) per labelled cell in reading order, where
+            bbox is the label strip and cell is GridCell.as_dict().
+        """
+        grey = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+        boxes = [cell.label_box(cell_size) for cell in cells]
+        by_corner = {(box[0], box[2]): cell for box, cell in zip(boxes, cells)}
+        # easyocr only batches recognition on GPU; on CPU it runs the crops one after another,
+        # which its authors measured to be faster there.
+        params = self._params_for(self.reader.recognize)
+        params["batch_size"] = len(boxes)
+        raw = self.reader.recognize(grey, horizontal_list=boxes, free_list=[], reformat=False, **params)
+        results = []
+        for bbox, text, prob in raw:
+            cell = by_corner.get((bbox[0][0], bbox[0][1]))
+            if cell is not None and text.strip():
+                results.append((bbox, text, prob, cell.as_dict()))
+        results.sort(key=lambda result: (result[3]["row"], result[3]["col"]))
+        logging.info(f"Read {len(results)} labels from {len(cells)} grid cells")
+        return results
+
+    def _known(self, texts: List[str]) -> List[bool]:
+        if self.term_checker is None:
+            from catalogue import load_item_index
+            from correction import TermCorrector
+            from settings import load_autocorrect_rules
+            self.term_checker = TermCorrector(load_autocorrect_rules(), load_item_index())
+        return self.term_checker.known_terms(texts)
+
+    def refine(self, pixels: np.ndarray, results: list) -> list:
+        """
+        Re-reads doubtful results from enhanced crops of the screenshot in one recognizer call.
+
+        A result is doubtful if its probability is below Config.OCR_REFINE_CONFIDENCE or its
+        text corrects to no item. Up to Config.OCR_REFINE_MAX_REGIONS of them, least probable
+        first, are cropped, turned into enhance_crop() variants and recognized together. A
+        reading only counts if it is more probable than the original or clears
+        Config.OCR_REFINE_CONFIDENCE, and a confident original that corrects to no item
+        is only replaced by a text at least two of its variants read. Each result keeps
+        the best of the original and the counted readings: one that corrects to an item
+        over one that does not, then the most probable.
+
+        Args:
+            pixels (np.ndarray): The RGB screenshot the results were read from.
+            results (list): Results of readtext() or recognize_cells().
+
+        Returns:
+            list: The results with refined text and probability; bboxes and grid cells are kept.
+        """
+        if not results:
+            return results
+        known = self._known([result[1] for result in results])
+        doubtful = [i for i, result in enumerate(results) if result[2] < Config.OCR_REFINE_CONFIDENCE or not known[i]]
+        doubtful = sorted(doubtful, key=lambda i: results[i][2])[:Config.OCR_REFINE_MAX_REGIONS]
+        if not doubtful:
+            return results
+
+        grey = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+        margin = Config.OCR_REFINE_MARGIN
+        crops, owners = [], []
+        for i in doubtful:
+            points = np.asarray(results[i][0], dtype=np.float32).reshape(-1, 2)
+            x_min, y_min = np.maximum(np.floor(points.min(axis=0)).astype(int) - margin, 0)
+            x_max, y_max = np.ceil(points.max(axis=0)).astype(int) + margin
+            crop = grey[y_min:y_max, x_min:x_max]
+            if min(crop.shape) < 4:
+                continue
+            for variant in enhance_crop(crop):
+                crops.append(variant)
+                owners.append(i)
+        if not crops:
+            return results
+
+        mosaic, boxes = _stack(crops)
+        owner_at = {box[2]: owner for box, owner in zip(boxes, owners)}
+        params = self._params_for(self.reader.recognize)
+        params["batch_size"] = len(boxes)
+        readings: Dict[int, List[tuple]] = {i: [] for i in doubtful}
+        for bbox, text, prob in self.reader.recognize(mosaic, horizontal_list=boxes, free_list=[],
+                                                      reformat=False, **params):
+            owner = owner_at.get(bbox[0][1])
+            if owner is not None and text.strip():
+                readings[owner].append((text, float(prob)))
+
+        flat = [text for i in doubtful for text, _ in readings[i]]
+        flat_known = iter(self._known(flat))
+        refined = list(results)
+        changed = 0
+        for i in doubtful:
+            original_prob = results[i][2]
+            options = [(next(flat_known), prob, text) for text, prob in readings[i]]
+            # A reading must beat the original's probability or be confident on its own.
+            options = [option for option in options
+                       if option[1] > original_prob or option[1] >= Config.OCR_REFINE_CONFIDENCE]
+            if original_prob >= Config.OCR_REFINE_CONFIDENCE:
+                # A confident read that is no item may be a real label; replace it only if the variants agree.
+                votes: Dict[str, int] = {}
+                for _, _, text in options:
+                    votes[text.strip().lower()] = votes.get(text.strip().lower(), 0) + 1
+                options = [option for option in options if votes[option[2].strip().lower()] > 1]
+            best = (known[i], original_prob, results[i][1])
+            for option in options:
+                best = max(best, option, key=lambda option: option[:2])
+            if best[2] != results[i][1]:
+                refined[i] = (results[i][0], best[2], best[1]) + tuple(results[i][3:])
+                changed += 1
+        logging.info(f"Refined {len(doubtful)} doubtful results, {changed} changed")
+        return refined
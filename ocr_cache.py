@@ -0,0 +1,94 @@
+# ocr_cache.py
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+from settings import Config
+from utils import resource_path, connect_sqlite
+
+def pixel_hash(pixels: np.ndarray) -> str:
+    """Hashes decoded pixels together with their shape, independent of file format or name."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((pixels.shape, pixels.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(pixels).data)
+    return digest.hexdigest()
+
+def _to_json_results(results: list) -> list:
+    return [[[[float(x), float(y)] for x, y in bbox], text, float(prob), *extra] for bbox, text, prob, *extra in results]
+
+class OCRCache:
+    """Persistent cache of readtext results keyed by pixel hash and OCR settings.
+
+    Each entry also records the model signature it was produced with, so entries
+    from an older model configuration can be dropped in one statement.
+    """
+
+    def __init__(self, path: str = Config.OCR_CACHE_FILE, max_entries: int = Config.OCR_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        db_path = path if path == ":memory:" else resource_path(path)
+        try:
+            self.conn = connect_sqlite(db_path)
+            self._create_schema()
+        except sqlite3.Error as e:
+            logging.error(f"Error opening OCR cache {db_path}, using an in-memory cache: {e}", exc_info=True)
+            self.conn = connect_sqlite(":memory:")
+            self._create_schema()
+
+    def _create_schema(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                results TEXT NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ocr_results_accessed_at ON ocr_results (accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ocr_results_model ON ocr_results (model)")
+
+    @staticmethod
+    def make_key(pixels: np.ndarray, settings_signature: str) -> str:
+        return f"{pixel_hash(pixels)}:{hashlib.blake2b(settings_signature.encode(), digest_size=8).hexdigest()}"
+
+    def get(self, key: str) -> Optional[List[tuple]]:
+        """Returns the cached (bbox, text, probability[, cell]) tuples, or None on a miss."""
+        with self.lock:
+            row = self.conn.execute("SELECT results FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE ocr_results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return [tuple(result) for result in json.loads(row[0])]
+
+    def put(self, key: str, model_signature: str, results: list):
+        """Stores results and evicts the least recently used entries over max_entries."""
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO ocr_results (key, model, results, accessed_at) VALUES (?, ?, ?, ?)",
+                              (key, model_signature, json.dumps(_to_json_results(results)), time.time()))
+            excess = self.conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.conn.execute("DELETE FROM ocr_results WHERE key IN "
+                                  "(SELECT key FROM ocr_results ORDER BY accessed_at ASC LIMIT ?)", (excess,))
+
+    def invalidate(self, keep_model_signature: Optional[str] = None) -> int:
+        """Drops every entry not produced by keep_model_signature (all entries if None)."""
+        with self.lock:
+            if keep_model_signature is None:
+                cursor = self.conn.execute("DELETE FROM ocr_results")
+            else:
+                cursor = self.conn.execute("DELETE FROM ocr_results WHERE model != ?", (keep_model_signature,))
+        if cursor.rowcount:
+            logging.info(f"Invalidated {cursor.rowcount} OCR cache entries")
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "size": size}
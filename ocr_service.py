@@ -0,0 +1,399 @@
+# ocr_service.py
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Union
+import numpy as np
+from PIL import Image
+from settings import AppSettings, Config
+from utils import to_pixels
+from image_processing import GridCell
+from metrics import metrics
+
+_STOP = None
+# Size of the shared cancelled-job flags, indexed by job id modulo this; far more than can be queued at once.
+_CANCEL_SLOTS = 1 << 16
+
+def _open_payload(payload):
+    """Returns the image a job refers to, and the shared memory block backing it, if any."""
+    if isinstance(payload, tuple) and payload[0] == "shm":
+        _, name, shape, dtype = payload
+        block = shared_memory.SharedMemory(name=name)
+        return np.ndarray(shape, dtype, buffer=block.buf), block
+    return payload, None
+
+def _read(processor, images: list, mode: tuple) -> List[list]:
+    """Runs the OCRProcessor call a job mode asks for; cell jobs come one image at a time."""
+    grid, use_cache, refine, cells = mode
+    if cells is not None:
+        return [processor.extract_cells(images[0], *cells, refine=refine)]
+    return processor.extract_text_batch(images, grid, use_cache=use_cache, refine=refine)
+
+def _run_batch(processor, batch: list, results, mode: tuple):
+    """OCRs one micro-batch of (job_id, payload) jobs sharing a mode and posts a result message per job."""
+    opened = [_open_payload(payload) for _, payload in batch]
+    images = [image for image, _ in opened]
+    blocks = [block for _, block in opened if block is not None]
+    del opened
+    start = time.perf_counter()
+    try:
+        outputs = _read(processor, images, mode)
+        seconds = (time.perf_counter() - start) / len(batch)
+        for (job_id, _), output, timings in zip(batch, outputs, processor.last_timings):
+            results.put(("done", job_id, output, seconds, timings))
+    except Exception as e:
+        if len(batch) == 1:
+            results.put(("error", batch[0][0], repr(e), time.perf_counter() - start, {}))
+        else:
+            # One bad image should not fail its neighbours: retry the batch one by one.
+            for i, (job_id, _) in enumerate(batch):
+                start = time.perf_counter()
+                try:
+                    output = _read(processor, [images[i]], mode)[0]
+                    results.put(("done", job_id, output, time.perf_counter() - start, processor.last_timings[0]))
+                except Exception as e:
+                    results.put(("error", job_id, repr(e), time.perf_counter() - start, {}))
+    finally:
+        # The arrays are views into the blocks, so they have to go before the blocks can close.
+        images.clear()
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                logging.debug("Shared image still referenced; it is released when collected")
+
+def _worker_main(generation: int, use_gpu: bool, torch_threads: int, jobs, results,
+                 max_batch: int, batch_window: float, profile: str, quantize: bool, cancelled):
+    """Worker process: holds one warm OCRProcessor and serves jobs until it receives _STOP."""
+    # Ctrl+C is handled by the parent, which stops the workers in order.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    try:
+        start = time.perf_counter()
+        from ocr import OCRProcessor
+        imported = time.perf_counter()
+        processor = OCRProcessor(use_gpu, profile=profile, quantize=quantize)
+        timings = {"import easyocr/torch": imported - start, "load OCR models": time.perf_counter() - imported}
+    except Exception as e:
+        results.put(("failed", generation, repr(e)))
+        return
+    results.put(("ready", generation, os.getpid(), timings))
+
+    stop = False
+    while not stop:
+        job = jobs.get()
+        if job is _STOP:
+            break
+        batch = [job]
+        # Gather whatever else is already waiting, up to a short window, into one batched call.
+        deadline = time.monotonic() + batch_window
+        while len(batch) < max_batch:
+            try:
+                job = jobs.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stop = True
+                break
+            batch.append(job)
+
+        # Jobs whose future was cancelled while queued are skipped, not OCR'd for nobody.
+        skipped = [job for job in batch if cancelled[job[0] % _CANCEL_SLOTS]]
+        for job_id, _, _ in skipped:
+            results.put(("cancelled", job_id))
+        batch = [job for job in batch if not cancelled[job[0] % _CANCEL_SLOTS]]
+        modes: Dict[tuple, list] = {}
+        for job_id, payload, mode in batch:
+            # Cell jobs each carry their own cells, so they are never grouped.
+            key = mode if mode[3] is None else (job_id,)
+            modes.setdefault(key, []).append((job_id, payload, mode))
+        for jobs_in_mode in modes.values():
+            _run_batch(processor, [(job_id, payload) for job_id, payload, _ in jobs_in_mode], results,
+                       jobs_in_mode[0][2])
+
+class _Generation:
+    """One set of worker processes sharing a job queue and an OCR configuration."""
+
+    def __init__(self, number: int, use_gpu: bool, jobs, processes: List[multiprocessing.Process]):
+        self.number = number
+        self.use_gpu = use_gpu
+        self.jobs = jobs
+        self.processes = processes
+        self.ready = threading.Event()
+        self.timings: Dict[str, float] = {}
+
+    def stop(self):
+        for _ in self.processes:
+            self.jobs.put(_STOP)
+
+class OCRService:
+    """Long-lived OCR worker processes behind a job queue, returning results through futures.
+
+    submit() never waits for model loading: jobs queue up until a worker is warm.
+    reconfigure() starts a new generation of workers in the background and only
+    routes new jobs to it once it is ready; the old workers drain their queue first.
+    """
+
+    def __init__(self, use_gpu: bool = True, workers: int = Config.OCR_SERVICE_WORKERS,
+                 max_batch: int = Config.OCR_MAX_BATCH, batch_window: float = Config.OCR_BATCH_WINDOW,
+                 profile: str = "default", quantize: bool = True, torch_threads: int = 0):
+        """torch_threads of 0 splits the CPU cores evenly between the workers."""
+        self.use_gpu = use_gpu
+        self.profile = profile
+        self.quantize = quantize
+        self.torch_threads = torch_threads
+        self.workers = max(1, workers)
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window
+        self.ctx = multiprocessing.get_context("spawn")
+        self.results = self.ctx.Queue()
+        self.cancelled = self.ctx.RawArray("B", _CANCEL_SLOTS)
+        self.pending: Dict[int, Future] = {}
+        self.shared: Dict[int, shared_memory.SharedMemory] = {}
+        self.job_ids = itertools.count()
+        self.generations = itertools.count(1)
+        self.lock = threading.Lock()
+        self.active: Optional[_Generation] = None
+        self.standby: Optional[_Generation] = None
+        self.retiring: List[_Generation] = []
+        self.dispatcher: Optional[threading.Thread] = None
+        self.closed = False
+        self.error: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls, settings: AppSettings, use_gpu: Optional[bool] = None, **kwargs) -> "OCRService":
+        """A service using the OCR profile, quantization and thread count chosen in settings."""
+        return cls(settings.ocr_use_gpu if use_gpu is None else use_gpu, profile=settings.ocr_profile,
+                   quantize=settings.ocr_quantize, torch_threads=settings.ocr_torch_threads, **kwargs)
+
+    def start(self) -> "OCRService":
+        self.active = self._spawn(self.use_gpu)
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        active = self.active
+        return active is not None and active.ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        active = self.active
+        return active is not None and active.ready.wait(timeout)
+
+    def startup_timings(self) -> Dict[str, float]:
+        """Seconds the first ready worker of the active generation spent on imports and model load."""
+        active = self.active
+        return dict(active.timings) if active is not None else {}
+
+    def _spawn(self, use_gpu: bool) -> _Generation:
+        number = next(self.generations)
+        jobs = self.ctx.Queue()
+        torch_threads = self.torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        processes = []
+        for _ in range(self.workers):
+            process = self.ctx.Process(target=_worker_main, daemon=True,
+                                       args=(number, use_gpu, torch_threads, jobs, self.results,
+                                             self.max_batch, self.batch_window, self.profile, self.quantize,
+                                             self.cancelled))
+            process.start()
+            processes.append(process)
+        logging.info(f"Started OCR worker generation {number} (GPU: {use_gpu}, profile: {self.profile}, "
+                     f"workers: {self.workers}, torch threads: {torch_threads})")
+        return _Generation(number, use_gpu, jobs, processes)
+
+    def submit(self, image: Union[str, Image.Image, np.ndarray], grid: bool = False, use_cache: bool = True,
+               cells: Optional[List[GridCell]] = None, cell_size: int = 0, refine: bool = False) -> Future:
+        """Queues an image for OCR; the future resolves to the (bbox, text, probability) list.
+
+        With grid set, only the item labels of a detected stash grid are read, see
+        OCRProcessor.recognize_cells(). Passing cells (with their grid's cell_size)
+        instead reads only those cells' labels, skipping grid detection and the cache;
+        see OCRProcessor.extract_cells(). use_cache=False keeps one-off images, such as
+        live capture frames, out of the OCR cache. With refine set, doubtful text is read
+        a second time from enhanced crops, see OCRProcessor.refine().
+
+        The future's ocr_seconds attribute holds the worker-side OCR time once it is done,
+        and its timings attribute the seconds per OCR stage (see OCRProcessor.last_timings).
+        Cancelling the future makes the worker skip the job if it has not started on it;
+        a job already being OCR'd runs to the end and its result is dropped.
+        """
+        if self.closed or self.active is None:
+            raise RuntimeError("OCR service is not running")
+        future = Future()
+        future.ocr_seconds = None
+        future.timings = {}
+        job_id = next(self.job_ids)
+        self.cancelled[job_id % _CANCEL_SLOTS] = 0
+        future.add_done_callback(lambda done: self._on_cancel(job_id, done))
+        mode = (grid, use_cache, refine, (cells, cell_size) if cells is not None else None)
+        payload = self._payload(image)
+        block = None
+        if isinstance(payload, np.ndarray) and payload.nbytes >= Config.OCR_SHARED_MEMORY_MIN_BYTES:
+            payload, block = self._share(payload)
+        with self.lock:
+            self.pending[job_id] = future
+            if block is not None:
+                self.shared[job_id] = block
+            self.active.jobs.put((job_id, payload, mode))
+        return future
+
+    def _on_cancel(self, job_id: int, future: Future):
+        """Flags a cancelled job so the worker skips it if it has not started on it yet."""
+        if future.cancelled():
+            self.cancelled[job_id % _CANCEL_SLOTS] = 1
+
+    @staticmethod
+    def _payload(image):
+        """Paths stay paths so the worker decodes them; PIL images are sent as RGB arrays."""
+        if isinstance(image, (str, np.ndarray)):
+            return image
+        if getattr(image, "filename", None):
+            return image.filename
+        return to_pixels(image)
+
+    @staticmethod
+    def _share(pixels: np.ndarray):
+        """Copies pixels into a shared memory block once, so the worker maps them instead of unpickling a copy."""
+        block = shared_memory.SharedMemory(create=True, size=max(1, pixels.nbytes))
+        np.ndarray(pixels.shape, pixels.dtype, buffer=block.buf)[...] = pixels
+        return ("shm", block.name, pixels.shape, pixels.dtype.str), block
+
+    def _release(self, job_ids):
+        """Frees the shared memory of finished jobs; the parent owns every block it created."""
+        with self.lock:
+            blocks = [self.shared.pop(job_id) for job_id in job_ids if job_id in self.shared]
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    def reconfigure(self, use_gpu: bool, profile: Optional[str] = None):
+        """Hot-swaps to workers with a new GPU setting or OCR profile without blocking or dropping queued jobs."""
+        with self.lock:
+            if profile is not None:
+                self.profile = profile
+            if self.standby is not None:
+                self.standby.stop()
+                self.retiring.append(self.standby)
+            self.use_gpu = use_gpu
+            self.standby = self._spawn(use_gpu)
+
+    def _activate(self, generation: _Generation):
+        with self.lock:
+            if generation is not self.standby:
+                return
+            old, self.active, self.standby = self.active, generation, None
+            old.stop()
+            self.retiring.append(old)
+        logging.info(f"OCR worker generation {generation.number} is now active")
+
+    def _find_generation(self, number: int) -> Optional[_Generation]:
+        for generation in [self.active, self.standby, *self.retiring]:
+            if generation is not None and generation.number == number:
+                return generation
+        return None
+
+    def _dispatch(self):
+        while True:
+            try:
+                message = self.results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            kind = message[0]
+            if kind == "shutdown":
+                return
+            if kind == "cancelled":
+                self._release([message[1]])
+                with self.lock:
+                    self.pending.pop(message[1], None)
+                metrics.count("ocr.cancelled")
+                continue
+            if kind in ("done", "error"):
+                _, job_id, payload, seconds, timings = message
+                self._release([job_id])
+                with self.lock:
+                    future = self.pending.pop(job_id, None)
+                # Futures are never marked running before this, so this is False only if cancelled.
+                if future is None or not future.set_running_or_notify_cancel():
+                    continue
+                future.ocr_seconds = seconds
+                future.timings = timings
+                # Workers are separate processes, so their stage timings are recorded here.
+                metrics.observe("ocr.worker", seconds)
+                for stage, stage_seconds in timings.items():
+                    metrics.observe(f"ocr.{stage}", stage_seconds)
+                if kind == "done":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(f"OCR failed: {payload}"))
+            elif kind == "ready":
+                generation = self._find_generation(message[1])
+                if generation is not None:
+                    logging.info(f"OCR worker {message[2]} of generation {message[1]} is ready: {message[3]}")
+                    generation.timings = generation.timings or message[3]
+                    generation.ready.set()
+                    if generation is self.standby:
+                        self._activate(generation)
+            elif kind == "failed":
+                logging.error(f"OCR worker of generation {message[1]} failed to start: {message[2]}")
+                generation = self._find_generation(message[1])
+                if generation is not None and generation is self.active and not generation.ready.is_set():
+                    self.error = message[2]
+                if generation is not None and generation is self.standby:
+                    with self.lock:
+                        self.standby = None
+                    generation.stop()
+
+    def _check_workers(self):
+        """Fails outstanding jobs if every worker that could run them has died."""
+        with self.lock:
+            self.retiring = [g for g in self.retiring if any(p.is_alive() for p in g.processes)]
+            active = self.active
+            if self.closed or active is None or any(p.is_alive() for p in active.processes):
+                return
+            if self.retiring:
+                return
+            pending, self.pending = self.pending, {}
+        self._release(list(pending))
+        if pending:
+            logging.error(f"All OCR workers exited; failing {len(pending)} pending jobs")
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("OCR workers exited"))
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stops every worker and fails any job still pending."""
+        if self.closed:
+            return
+        self.closed = True
+        with self.lock:
+            generations = [g for g in [self.active, self.standby, *self.retiring] if g is not None]
+        for generation in generations:
+            generation.stop()
+        deadline = time.monotonic() + timeout
+        for generation in generations:
+            for process in generation.processes:
+                process.join(max(0.0, deadline - time.monotonic()))
+                if process.is_alive():
+                    process.terminate()
+        self.results.put(("shutdown",))
+        if self.dispatcher is not None:
+            self.dispatcher.join(max(0.0, deadline - time.monotonic()) + 1.0)
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        self._release(list(self.shared))
+        for future in pending.values():
+            future.cancel()
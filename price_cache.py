@@ -0,0 +1,99 @@
+# price_cache.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+from settings import Config
+from enums import CacheState
+from utils import resource_path, connect_sqlite
+
+def cache_key(item_name: str) -> str:
+    """Normalizes an item name into a cache key: case- and whitespace-insensitive."""
+    return ' '.join(item_name.lower().split())
+
+class PriceCache:
+    """Persistent SQLite cache of item data, keyed by normalized item name.
+
+    Entries younger than ttl are fresh. Older entries are reported as stale until
+    they pass max_stale, so callers can serve them while a refresh runs. The
+    least recently read entries are evicted once max_entries is exceeded.
+    """
+
+    def __init__(self, path: str = Config.PRICE_CACHE_FILE, ttl: int = Config.CACHE_TTL,
+                 max_entries: int = Config.PRICE_CACHE_MAX_ENTRIES,
+                 max_stale: int = Config.PRICE_CACHE_MAX_STALE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        db_path = path if path == ":memory:" else resource_path(path)
+        try:
+            self.conn = connect_sqlite(db_path)
+            self._create_schema()
+            logging.info(f"Price cache opened at {db_path}")
+        except sqlite3.Error as e:
+            logging.error(f"Error opening price cache {db_path}, using an in-memory cache: {e}", exc_info=True)
+            self.conn = connect_sqlite(":memory:")
+            self._create_schema()
+
+    def _create_schema(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS prices (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS prices_accessed_at ON prices (accessed_at)")
+
+    def get(self, item_name: str) -> Tuple[CacheState, Optional[List[dict]]]:
+        """Looks up an item, returning its cache state and data (None on a miss)."""
+        key = cache_key(item_name)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT data, fetched_at FROM prices WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] >= self.ttl + self.max_stale:
+                self.misses += 1
+                logging.debug(f"Cache miss for {item_name}")
+                return CacheState.MISS, None
+            self.conn.execute("UPDATE prices SET accessed_at = ? WHERE key = ?", (now, key))
+            if now - row[1] < self.ttl:
+                self.hits += 1
+                logging.debug(f"Cache hit for {item_name}")
+                return CacheState.FRESH, json.loads(row[0])
+            self.stale += 1
+            logging.debug(f"Cache expired for {item_name}")
+            return CacheState.STALE, json.loads(row[0])
+
+    def put(self, item_name: str, item_data: List[dict]):
+        """Stores fresh data for an item and evicts the least recently read entries over the cap."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO prices (key, data, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                              (cache_key(item_name), json.dumps(item_data), now, now))
+            excess = self.conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.conn.execute("DELETE FROM prices WHERE key IN "
+                                  "(SELECT key FROM prices ORDER BY accessed_at ASC LIMIT ?)", (excess,))
+                self.evictions += excess
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM prices")
+
+    def stats(self) -> dict:
+        """Returns hit/miss/stale/eviction counters and the current number of entries."""
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "stale": self.stale,
+                    "evictions": self.evictions, "size": size}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
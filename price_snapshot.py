@@ -0,0 +1,179 @@
+# price_snapshot.py
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from settings import Config
+from utils import resource_path
+
+SNAPSHOT_QUERY = """
+query allItems {
+  items {
+    id
+    name
+    shortName
+    avg24hPrice
+    basePrice
+    wikiLink
+  }
+}
+"""
+
+SNAPSHOT_FIELDS = ("id", "name", "shortName", "avg24hPrice", "basePrice", "wikiLink")
+
+def normalize_name(name: str) -> str:
+    return ' '.join((name or "").lower().split())
+
+class SnapshotData:
+    """One immutable generation of the catalogue, stored column-wise and indexed by name.
+
+    Names are normalized (lowercase, single-spaced) once on load. Exact names resolve
+    through a dict; substring lookups, which itemsByName semantics need, go through a
+    trigram index: only the rows listed under the needle's rarest trigram are checked.
+    Lookups are memoized in a bounded, locked LRU, as they are repeated across screenshots.
+    """
+
+    MEMO_SIZE = 4096
+    GRAM = 3
+
+    def __init__(self, columns: Dict[str, list], fetched_at: float):
+        self.columns = columns
+        self.fetched_at = fetched_at
+        self.lower_names = [normalize_name(name) for name in columns["name"]]
+        self.exact: Dict[str, List[int]] = {}
+        grams: Dict[str, List[int]] = {}
+        for idx, name in enumerate(self.lower_names):
+            self.exact.setdefault(name, []).append(idx)
+            for gram in {name[i:i + self.GRAM] for i in range(len(name) - self.GRAM + 1)}:
+                grams.setdefault(gram, []).append(idx)
+        self.grams = grams
+        self.memo: "OrderedDict[str, List[int]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.lower_names)
+
+    def row(self, idx: int) -> dict:
+        return {field: self.columns[field][idx] for field in SNAPSHOT_FIELDS}
+
+    def _find(self, needle: str) -> List[int]:
+        if len(needle) < self.GRAM:
+            return [idx for idx, name in enumerate(self.lower_names) if needle in name]
+        postings = [self.grams.get(needle[i:i + self.GRAM], ()) for i in range(len(needle) - self.GRAM + 1)]
+        candidates = min(postings, key=len)
+        if len(needle) == self.GRAM:
+            return list(candidates)
+        names = self.lower_names
+        return [idx for idx in candidates if needle in names[idx]]
+
+    def lookup(self, item_name: str) -> List[dict]:
+        """Answers like itemsByName: every item whose name contains item_name, ignoring case.
+
+        Items named exactly item_name come first. An empty or blank item_name matches nothing.
+        """
+        needle = normalize_name(item_name)
+        if not needle:
+            return []
+        with self.lock:
+            rows = self.memo.get(needle)
+            if rows is not None:
+                self.memo.move_to_end(needle)
+        if rows is None:
+            exact = self.exact.get(needle, [])
+            rows = exact + [idx for idx in self._find(needle) if idx not in exact]
+            with self.lock:
+                self.memo[needle] = rows
+                while len(self.memo) > self.MEMO_SIZE:
+                    self.memo.popitem(last=False)
+        return [self.row(idx) for idx in rows]
+
+    @classmethod
+    def from_items(cls, items: List[dict], fetched_at: Optional[float] = None) -> "SnapshotData":
+        columns = {field: [item.get(field) for item in items if item.get("name")] for field in SNAPSHOT_FIELDS}
+        return cls(columns, fetched_at or time.time())
+
+class PriceSnapshot:
+    """Full-catalogue price snapshot answered from memory and refreshed on a schedule.
+
+    The current generation is swapped in with a single reference assignment, so
+    readers never see a half-built snapshot and need no lock.
+    """
+
+    def __init__(self, path: str = Config.PRICE_SNAPSHOT_FILE,
+                 refresh_interval: int = Config.PRICE_SNAPSHOT_REFRESH_INTERVAL):
+        self.path = resource_path(path)
+        self.refresh_interval = refresh_interval
+        self.data: Optional[SnapshotData] = None
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.data is not None
+
+    def age(self) -> float:
+        data = self.data
+        return time.time() - data.fetched_at if data else float("inf")
+
+    def lookup(self, item_name: str) -> Optional[List[dict]]:
+        """Returns the matching items, or None when no snapshot is loaded."""
+        data = self.data
+        return data.lookup(item_name) if data else None
+
+    def swap(self, items: List[dict]):
+        """Replaces the in-memory snapshot with a freshly downloaded item list and saves it."""
+        self.data = SnapshotData.from_items(items)
+        logging.info(f"Price snapshot updated with {len(self.data)} items")
+        self.save()
+
+    def load(self) -> bool:
+        """Loads the snapshot saved on disk, if any."""
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                stored = json.load(f)
+            self.data = SnapshotData(stored["columns"], stored["fetched_at"])
+            logging.info(f"Price snapshot loaded: {len(self.data)} items, {self.age():.0f}s old")
+            return True
+        except FileNotFoundError:
+            logging.info(f"No price snapshot at {self.path}")
+        except Exception as e:
+            logging.error(f"Error loading price snapshot: {e}", exc_info=True)
+        return False
+
+    def save(self):
+        data = self.data
+        if data is None:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"fetched_at": data.fetched_at, "columns": data.columns}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error saving price snapshot: {e}", exc_info=True)
+
+    def start(self, download: Callable[[], Optional[List[dict]]]):
+        """Loads the saved snapshot and keeps it fresh from download() on a background thread."""
+        self.load()
+
+        def run():
+            delay = max(0.0, self.refresh_interval - self.age())
+            while not self.stop_event.wait(delay):
+                items = download()
+                if items:
+                    self.swap(items)
+                    delay = self.refresh_interval
+                else:
+                    logging.warning("Price snapshot download failed; keeping the current snapshot")
+                    delay = min(self.refresh_interval, Config.PRICE_SNAPSHOT_RETRY_INTERVAL)
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
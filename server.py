@@ -0,0 +1,191 @@
+# server.py
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from PIL import Image, UnidentifiedImageError
+from settings import AppSettings, Config
+from api import TarkovAPI
+from ocr_service import OCRService
+from ocr_cache import pixel_hash
+from history import HistoryStore
+from utils import to_pixels
+from metrics import metrics
+import batch
+
+class PricingHandler(BaseHTTPRequestHandler):
+    """POST /price with an image body; GET /health and /metrics (Prometheus text, or ?format=json)."""
+    server_version = "ScreenshotIngestor/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            health = self.server.health()
+            self._send_json(200 if health["status"] == "ok" else 503, health)
+        elif url.path == "/metrics":
+            if parse_qs(url.query).get("format") == ["json"]:
+                self._send(200, metrics.to_json().encode("utf-8"), "application/json")
+            else:
+                self._send(200, metrics.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/price":
+            self.close_connection = True
+            self._send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self.close_connection = True
+            self._send_json(411, {"error": "Send the image as the request body, with a Content-Length"})
+            return
+        if length > Config.SERVE_MAX_IMAGE_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"Images are limited to {Config.SERVE_MAX_IMAGE_BYTES} bytes"})
+            return
+        server = self.server
+        # Back-pressure: refuse before reading the body rather than queueing without bound.
+        if not server.slots.acquire(blocking=False):
+            metrics.count("serve.rejected")
+            self.close_connection = True
+            self._send_json(429, {"error": "Too many pending requests"}, {"Retry-After": "1"})
+            return
+        try:
+            metrics.count("serve.requests")
+            with metrics.span("serve.request"):
+                query = parse_qs(url.query)
+                grid = query.get("grid", [str(server.grid)])[-1].lower() in ("1", "true", "yes")
+                refine = query.get("refine", [str(server.refine)])[-1].lower() in ("1", "true", "yes")
+                status, body = server.price(self.rfile.read(length), grid, refine)
+        except Exception as e:
+            # A failed job, corrector or price lookup must still answer the client on a keep-alive connection.
+            logging.error(f"Error pricing image: {e}", exc_info=True)
+            status, body = 500, {"error": f"Internal error: {e!r}"}
+        finally:
+            server.slots.release()
+        if status != 200:
+            metrics.count("serve.errors")
+        self._send_json(status, body)
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None):
+        self._send(status, json.dumps(body).encode("utf-8"), "application/json", headers)
+
+    def _send(self, status: int, payload: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+class PricingServer(ThreadingHTTPServer):
+    """Prices screenshots for any number of local clients with one warm OCR worker.
+
+    Every request thread submits to the same OCRService, whose worker gathers jobs
+    arriving within its batch window into one batched OCR call, so concurrent
+    clients share batches. At most max_pending requests are in flight; the rest
+    get 429 with Retry-After.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: OCRService, corrector, api: TarkovAPI,
+                 max_pending: int = Config.SERVE_MAX_PENDING, grid: bool = False,
+                 history: Optional[HistoryStore] = None, refine: bool = False):
+        super().__init__(address, PricingHandler)
+        self.service = service
+        self.corrector = corrector
+        self.api = api
+        self.grid = grid
+        self.refine = refine
+        self.history = history
+        self.max_pending = max(1, max_pending)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.started = time.time()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def health(self) -> dict:
+        return {"status": "error" if self.service.error else "ok" if self.service.ready else "starting",
+                "ocr_error": self.service.error,
+                "pending": len(self.service.pending),
+                "max_pending": self.max_pending,
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "price_cache": self.api.cache_stats()}
+
+    def price(self, data: bytes, grid: bool, refine: bool = False) -> Tuple[int, dict]:
+        """Runs one image through OCR, correction and price lookup; returns (HTTP status, JSON body)."""
+        start = time.perf_counter()
+        try:
+            with Image.open(BytesIO(data)) as img:
+                pixels = to_pixels(img)
+        except (OSError, UnidentifiedImageError, ValueError) as e:
+            return 400, {"error": f"Could not decode image: {e}"}
+        decoded = time.perf_counter()
+        try:
+            future = self.service.submit(pixels, grid, refine=refine)
+            results = future.result(Config.SERVE_REQUEST_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            return 504, {"error": "OCR timed out"}
+        except RuntimeError as e:
+            return 503, {"error": str(e)}
+        recognized = time.perf_counter()
+        lines, counts = self.corrector.correct_results(results)
+        cells = self.corrector.item_cells(results, lines)
+        corrected = time.perf_counter()
+        items_data = self.api.get_items_data(counts.keys()) if counts else {}
+        items = [{key: value for key, value in row.items() if key != "image"}
+                 for row in batch.result_rows({"image": None, "counts": counts, "cells": cells}, items_data)]
+        done = time.perf_counter()
+        if self.history is not None:
+            self.history.record(pixel_hash(pixels), "http", counts, items_data,
+                                {"decode": decoded - start, "ocr": recognized - decoded, **future.timings,
+                                 "correct": corrected - recognized, "prices": done - corrected})
+        return 200, {"items": items, "counts": counts, "lines": lines,
+                     "timings_ms": {"decode": round((decoded - start) * 1000, 1),
+                                    "ocr": round((recognized - decoded) * 1000, 1),
+                                    "ocr_worker": round((future.ocr_seconds or 0.0) * 1000, 1),
+                                    "correct": round((corrected - recognized) * 1000, 1),
+                                    "prices": round((done - corrected) * 1000, 1),
+                                    "total": round((done - start) * 1000, 1)}}
+
+def run_serve(host: str = Config.SERVE_HOST, port: int = Config.SERVE_PORT, use_gpu: Optional[bool] = None,
+              max_pending: int = Config.SERVE_MAX_PENDING, batch_window: float = Config.SERVE_BATCH_WINDOW):
+    """Serves the pricing pipeline over HTTP until interrupted."""
+    settings = AppSettings()
+    use_gpu = settings.ocr_use_gpu if use_gpu is None else use_gpu
+    metrics.enabled = True
+    service = OCRService.from_settings(settings, use_gpu, batch_window=batch_window).start()
+    api = TarkovAPI()
+    if settings.use_price_snapshot:
+        api.enable_snapshot()
+    corrector = batch.make_corrector(settings.use_item_corrections)
+    history = HistoryStore(kind="serve") if settings.history_enabled else None
+    server = PricingServer((host, port), service, corrector, api, max_pending, settings.ocr_grid_mode, history,
+                           settings.ocr_refine)
+    print(f"Serving on {server.url} (POST /price, GET /health, GET /metrics; Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if history is not None:
+            history.close()
@@ -6,20 +6,86 @@ import os
 import logging
 from utils import resource_path
 
+# OCR profile names and their menu labels; see ocr.profile_params().
+OCR_PROFILES = {"default": "Default", "fast_cpu": "Fast CPU (experimental)"}
+
 @dataclasses.dataclass
 class Config:
     API_URL: str = "https://api.tarkov.dev/graphql"
     CACHE_TTL: int = 3600
-    REQUEST_DELAY: float = 0.2
+    CACHE_STALE_WHILE_REVALIDATE: bool = True
+    PRICE_CACHE_FILE: str = "data/price_cache.sqlite3"
+    PRICE_CACHE_MAX_ENTRIES: int = 20000
+    PRICE_CACHE_MAX_STALE: int = 7 * 24 * 3600
+    PRICE_SNAPSHOT_FILE: str = "data/price_snapshot.json.gz"
+    PRICE_SNAPSHOT_REFRESH_INTERVAL: int = 3600
+    PRICE_SNAPSHOT_RETRY_INTERVAL: int = 300
+    API_RATE_LIMIT: float = 5.0  # Requests per second, 0 for no limit
+    API_RATE_BURST: int = 2
+    API_MAX_CONCURRENCY: int = 4
+    API_TIMEOUT: float = 20.0
+    API_BACKOFF_BASE: float = 0.5
+    API_BACKOFF_MAX: float = 8.0
     MAX_RETRIES: int = 3
+    API_BATCH_SIZE: int = 25
     LOG_FILE: str = "logs/screenshot_ingestor.log"
     LOG_LEVEL: int = logging.INFO
     SETTINGS_FILE: str = "data/settings.ini"
     AUTOCORRECT_FILE: str = "data/autocorrect_rules.json"
     ITEM_NAMES_FILE: str = "data/item_names.json"
+    ITEM_CATALOGUE_FILE: str = "data/item_catalogue.bin"
     FUZZY_MATCH_THRESHOLD: int = 80
+    FUZZY_MIN_LENGTH: int = 3
+    FUZZY_PARTIAL_THRESHOLD: int = 88
+    FUZZY_PARTIAL_MIN_LENGTH: int = 6
+    FUZZY_PARTIAL_MIN_TOKENS: int = 2
+    FUZZY_PARTIAL_MIN_LENGTH_RATIO: float = 0.5
+    CORRECTION_CACHE_SIZE: int = 4096
+    OCR_SERVICE_WORKERS: int = 1
+    OCR_MAX_BATCH: int = 4
+    OCR_BATCH_WINDOW: float = 0.02
+    OCR_SHARED_MEMORY_MIN_BYTES: int = 1 << 20
+    # Untuned starting points for the experimental fast_cpu profile.
+    OCR_FAST_CANVAS_SIZE: int = 1280
+    OCR_FAST_TEXT_THRESHOLD: float = 0.6
+    OCR_FAST_LOW_TEXT: float = 0.35
+    OCR_FAST_LINK_THRESHOLD: float = 0.3
+    OCR_FAST_WIDTH_THS: float = 0.7
+    OCR_REFINE_CONFIDENCE: float = 0.5
+    OCR_REFINE_MAX_REGIONS: int = 32
+    OCR_REFINE_TEXT_HEIGHT: int = 48
+    OCR_REFINE_MAX_SCALE: float = 4.0
+    OCR_REFINE_MARGIN: int = 3
+    OCR_CACHE_FILE: str = "data/ocr_cache.sqlite3"
+    OCR_CACHE_MAX_ENTRIES: int = 2000
+    GRID_MIN_CELL_SIZE: int = 32
+    GRID_MAX_CELL_SIZE: int = 160
+    GRID_MAX_ITEM_CELLS: int = 6
+    GRID_MIN_CELLS: int = 6
+    GRID_LABEL_HEIGHT: float = 0.28
+    GRID_LABEL_INSET: int = 2
+    CAPTURE_FPS: float = 2.0
+    CAPTURE_TILE_SIZE: int = 256
+    CAPTURE_TILE_MARGIN: int = 128
+    CAPTURE_CHANGE_THRESHOLD: float = 3.0
+    SERVE_HOST: str = "127.0.0.1"
+    SERVE_PORT: int = 8788
+    SERVE_MAX_PENDING: int = 16
+    SERVE_MAX_IMAGE_BYTES: int = 32 << 20
+    SERVE_BATCH_WINDOW: float = 0.05
+    SERVE_REQUEST_TIMEOUT: float = 120.0
+    UI_POLL_INTERVAL_MS: int = 50
+    UI_MAX_UPDATES_PER_POLL: int = 500
     DEFAULT_IMAGE_WIDTH: int = 500
     DEFAULT_IMAGE_HEIGHT: int = 500
+    BATCH_WORKERS: int = 2
+    WATCH_STATE_FILE: str = "data/watch_state.sqlite3"
+    WATCH_POLL_INTERVAL: float = 2.0
+    WATCH_DEBOUNCE: float = 1.0
+    WATCH_QUEUE_SIZE: int = 8
+    HISTORY_FILE: str = "data/history.sqlite3"
+    HISTORY_FLUSH_INTERVAL: float = 1.0
+    HISTORY_BATCH_SIZE: int = 256
 
 class AppSettings:
     def __init__(self, settings_file: str = Config.SETTINGS_FILE):
@@ -27,6 +93,16 @@ class AppSettings:
         self.settings_file = resource_path(settings_file)
         self.ocr_use_gpu: bool = True
         self.use_item_corrections: bool = True
+        self.use_price_snapshot: bool = False
+        self.ocr_grid_mode: bool = False
+        self.capture_region: str = ""
+        self.capture_fps: float = Config.CAPTURE_FPS
+        self.metrics_enabled: bool = False
+        self.ocr_profile: str = "default"
+        self.ocr_torch_threads: int = 0
+        self.ocr_quantize: bool = True
+        self.ocr_refine: bool = False
+        self.history_enabled: bool = True
         self.load_settings()
 
     def load_settings(self):
@@ -34,6 +110,18 @@ class AppSettings:
             self.config.read(self.settings_file)
             self.ocr_use_gpu = self.config.getboolean("Settings", "ocr_use_gpu", fallback=True)
             self.use_item_corrections = self.config.getboolean("Settings", "use_item_corrections", fallback=True)
+            self.use_price_snapshot = self.config.getboolean("Settings", "use_price_snapshot", fallback=False)
+            self.ocr_grid_mode = self.config.getboolean("Settings", "ocr_grid_mode", fallback=False)
+            self.capture_region = self.config.get("Settings", "capture_region", fallback="")
+            self.capture_fps = self.config.getfloat("Settings", "capture_fps", fallback=Config.CAPTURE_FPS)
+            self.metrics_enabled = self.config.getboolean("Settings", "metrics_enabled", fallback=False)
+            self.ocr_profile = self.config.get("Settings", "ocr_profile", fallback="default")
+            if self.ocr_profile not in OCR_PROFILES:
+                self.ocr_profile = "default"
+            self.ocr_torch_threads = self.config.getint("Settings", "ocr_torch_threads", fallback=0)
+            self.ocr_quantize = self.config.getboolean("Settings", "ocr_quantize", fallback=True)
+            self.ocr_refine = self.config.getboolean("Settings", "ocr_refine", fallback=False)
+            self.history_enabled = self.config.getboolean("Settings", "history_enabled", fallback=True)
             logging.info("Settings loaded successfully from INI.")
         except Exception as e:
             logging.error(f"Error loading settings: {e}", exc_info=True)
@@ -43,6 +131,16 @@ class AppSettings:
         self.config["Settings"] = {
             "ocr_use_gpu": str(self.ocr_use_gpu),
             "use_item_corrections": str(self.use_item_corrections),
+            "use_price_snapshot": str(self.use_price_snapshot),
+            "ocr_grid_mode": str(self.ocr_grid_mode),
+            "capture_region": self.capture_region,
+            "capture_fps": str(self.capture_fps),
+            "metrics_enabled": str(self.metrics_enabled),
+            "ocr_profile": self.ocr_profile,
+            "ocr_torch_threads": str(self.ocr_torch_threads),
+            "ocr_quantize": str(self.ocr_quantize),
+            "ocr_refine": str(self.ocr_refine),
+            "history_enabled": str(self.history_enabled),
         }
         try:
             with open(self.settings_file, "w") as configfile:
@@ -0,0 +1,58 @@
+# startup.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+class StartupProfile:
+    """Records how long each import and initialization step of a cold start takes.
+
+    Times are measured from when the profile is created, which main.py does first,
+    so steps that run on background threads line up with the ones on the UI thread.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.steps: List[Tuple[str, float, float, str]] = []
+        self.reported = False
+
+    def now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def record(self, name: str, start: float, end: float):
+        with self.lock:
+            self.steps.append((name, start, end, threading.current_thread().name))
+
+    @contextmanager
+    def span(self, name: str):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.record(name, start, self.now())
+
+    def mark(self, name: str):
+        """Records a milestone, such as the window becoming interactive."""
+        now = self.now()
+        self.record(name, now, now)
+
+    def report(self) -> str:
+        with self.lock:
+            steps = sorted(self.steps, key=lambda step: step[1])
+        lines = ["Startup profile (ms since launch):",
+                 f"  {'step':<34} {'start':>8} {'took':>8}  thread"]
+        for name, start, end, thread in steps:
+            lines.append(f"  {name:<34} {start * 1000:8.1f} {(end - start) * 1000:8.1f}  {thread}")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Prints and logs the report once, if profiling is enabled."""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        report = self.report()
+        print(report)
+        logging.info(report)
@@ -0,0 +1,47 @@
+import threading
+import time
+import pytest
+from api import TarkovAPI
+from price_cache import PriceCache
+from benchmarks.fake_api import start_fake_api
+
+@pytest.fixture
+def fake_api():
+    server = start_fake_api(latency=0.2)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_api(server) -> TarkovAPI:
+    return TarkovAPI(server.url, cache=PriceCache(":memory:"), rate_limit=0)
+
+def test_concurrent_lookups_of_one_name_share_a_request(fake_api):
+    api = make_api(fake_api)
+    start = threading.Barrier(4)
+    results = []
+
+    def lookup():
+        start.wait()
+        results.append(api.get_items_data(["Bolts"]))
+
+    threads = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert fake_api.request_count == 1
+    assert api.cache_stats()["coalesced"] == 3
+    assert len(results) == 4
+    assert all(result["Bolts"] and result["Bolts"][0]["name"] == "Bolts" for result in results)
+
+def test_429_is_retried_after_retry_after(fake_api):
+    api = make_api(fake_api)
+    fake_api.throttle(1, retry_after=1)
+    start = time.monotonic()
+    data = api.get_item_data("Bolts")
+    elapsed = time.monotonic() - start
+
+    assert data and data[0]["name"] == "Bolts"
+    assert fake_api.request_count == 2
+    assert elapsed >= 1.0
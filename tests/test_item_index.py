@@ -0,0 +1,35 @@
+import pytest
+from item_index import ItemNameIndex
+
+ITEMS = [
+    ("SIG MPX 9x19 submachine gun", "MPX"),
+    ("Kalashnikov AKM 7.62x39 assault rifle", "AKM"),
+    ("SSO Attack 2 raid backpack (Khaki)", "Attack 2"),
+    ("Model 7290 Flash Bang grenade", "Zarya"),
+    ("TP-200 TNT brick", "TP-200"),
+    ("Energy-saving lamp", "ES Lamp"),
+    ("Can of white salt", "Salt"),
+    ("Gas analyzer", "GasAn"),
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return ItemNameIndex([str(i) for i in range(len(ITEMS))], [name for name, _ in ITEMS],
+                         [short for _, short in ITEMS])
+
+@pytest.mark.parametrize("noise", ["x", "ak", "Found in raid", "Mil flash", "In raid", "Total value", ""])
+def test_noise_is_not_matched(index, noise):
+    assert index.best_name(noise) is None
+
+@pytest.mark.parametrize("term, name", [
+    ("es lamp", "Energy-saving lamp"),
+    ("AKM", "Kalashnikov AKM 7.62x39 assault rifle"),
+    ("gas analyser", "Gas analyzer"),
+    ("tnt brick", "TP-200 TNT brick"),
+    ("white salt", "Can of white salt"),
+])
+def test_items_are_matched(index, term, name):
+    assert index.best_name(term) == name
+
+def test_match_many_keeps_order(index):
+    assert index.match_many(["x", "tnt brick", "Found in raid", "es lamp"]) == [None, 4, None, 5]
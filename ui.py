@@ -1,16 +1,20 @@
 # ui.py
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from PIL import Image, ImageGrab
+import queue
 import threading
+import time
 import logging
-from settings import AppSettings, Config, load_autocorrect_rules, load_item_name_lookup
-from ocr import OCRProcessor
-from api import TarkovAPI
-from utils import preprocess_search_term
-from fuzzywuzzy import process
+from concurrent.futures import CancelledError
+from typing import Optional
+from settings import AppSettings, Config, OCR_PROFILES, load_autocorrect_rules
+from ocr_service import OCRService
+from ocr_cache import pixel_hash
 from image_processing import ImageDisplay
 from enums import AppState
+from startup import StartupProfile
+from metrics import metrics, RunBreakdown
 
 class Tooltip:
     def __init__(self, widget, text):
@@ -40,7 +44,8 @@ class Tooltip:
         self.tip_window = None
 
 class ScreenshotIngestorApp:
-    def __init__(self):
+    def __init__(self, startup: Optional[StartupProfile] = None):
+        self.startup = startup or StartupProfile()
         self.root = tk.Tk()
         self.root.title("Screenshot Ingestor")
         self.root.geometry("1080x720")
@@ -56,21 +61,111 @@ class ScreenshotIngestorApp:
                        foreground=[("active", "#000000")])
 
         self.settings = AppSettings()
-        self.api = TarkovAPI()
-        self.ocr = OCRProcessor(self.settings.ocr_use_gpu)
-        self.autocorrect_rules = load_autocorrect_rules()
-        self.item_name_lookup = load_item_name_lookup()
-
-        self.setup_ui()
+        metrics.enabled = metrics.enabled or self.settings.metrics_enabled
+        self.load_seconds = None
+        self.ocr_started = self.startup.now()
+        with self.startup.span("start OCR workers"):
+            self.ocr = OCRService.from_settings(self.settings).start()
+
+        # Item data, the fuzzy index and the API client are built by warm_up() in the background.
+        self.api = None
+        self.autocorrect_rules = {}
+        self.item_index = None
+        self.corrector = None
+        self.history = None
+        self.image_source = None
+        self.data_ready = threading.Event()
+        self.live = None
+        self.live_update = None
+        self.live_shown = None
+        self.live_lock = threading.Lock()
+        # Worker threads never touch widgets: they post (run_id, kind, args) here for drain_ui_queue().
+        self.ui_queue = queue.Queue()
+        self.run_id = 0
+        self.run_started = 0.0
+        self.run_first_shown = False
+        self.ocr_future = None
+        threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+        with self.startup.span("build window"):
+            self.setup_ui()
+        self.set_status(AppState.WARMING_UP, "Loading OCR models and item data...")
+        self.root.after(0, self.startup.mark, "window interactive")
+        self.root.after(100, self.check_ready)
+        self.root.after(Config.UI_POLL_INTERVAL_MS, self.drain_ui_queue)
+
+    def warm_up(self):
+        """Loads everything that is not needed to show the window."""
+        try:
+            with self.startup.span("import api/correction modules"):
+                from api import TarkovAPI
+                from catalogue import load_item_index
+                from correction import TermCorrector
+            with self.startup.span("load autocorrect rules"):
+                self.autocorrect_rules = load_autocorrect_rules()
+            with self.startup.span("load item index"):
+                self.item_index = load_item_index()
+                self.corrector = TermCorrector(self.autocorrect_rules, self.item_index,
+                                               self.settings.use_item_corrections)
+            if self.settings.history_enabled:
+                with self.startup.span("open history store"):
+                    from history import HistoryStore
+                    self.history = HistoryStore(kind="gui")
+            with self.startup.span("open price cache"):
+                self.api = TarkovAPI()
+                if self.settings.use_price_snapshot:
+                    self.api.enable_snapshot()
+        except Exception as e:
+            logging.error(f"Error during warm-up: {e}", exc_info=True)
+        finally:
+            self.data_ready.set()
+
+    def check_ready(self):
+        """Polls warm-up from the Tk loop and flips the status to Ready once everything is loaded."""
+        if self.ocr.error:
+            self.set_status(AppState.ERROR, f"OCR failed to start: {self.ocr.error}")
+            return
+        if not (self.data_ready.is_set() and self.ocr.ready):
+            self.root.after(100, self.check_ready)
+            return
+        if self.api is None:
+            self.set_status(AppState.ERROR, "Failed to load item data; see the log.")
+        elif self.status_label.cget("text").startswith(AppState.WARMING_UP.value):
+            self.set_status(AppState.READY)
+        start = self.ocr_started
+        for name, seconds in self.ocr.startup_timings().items():
+            self.startup.record(f"OCR worker: {name}", start, start + seconds)
+            start += seconds
+        self.startup.mark("OCR and item data ready")
+        self.startup.finish()
 
     def setup_ui(self):
         # Menu
         menubar = tk.Menu(self.root)
         filemenu = tk.Menu(menubar, tearoff=0)
+        filemenu.add_command(label="Export Metrics...", command=self.export_metrics)
+        filemenu.add_separator()
         filemenu.add_command(label="Exit", command=self.on_closing)
         settingsmenu = tk.Menu(menubar, tearoff=0)
         self.gpu_var = tk.BooleanVar(value=self.settings.ocr_use_gpu)
         settingsmenu.add_checkbutton(label="Use GPU for OCR", variable=self.gpu_var, command=self.toggle_gpu)
+        self.snapshot_var = tk.BooleanVar(value=self.settings.use_price_snapshot)
+        settingsmenu.add_checkbutton(label="Use Offline Price Snapshot", variable=self.snapshot_var, command=self.toggle_snapshot)
+        self.grid_var = tk.BooleanVar(value=self.settings.ocr_grid_mode)
+        settingsmenu.add_checkbutton(label="Read Stash Grid Labels Only", variable=self.grid_var, command=self.toggle_grid_mode)
+        self.history_var = tk.BooleanVar(value=self.settings.history_enabled)
+        settingsmenu.add_checkbutton(label="Record Price History", variable=self.history_var, command=self.toggle_history)
+        self.metrics_var = tk.BooleanVar(value=metrics.enabled)
+        settingsmenu.add_checkbutton(label="Collect Performance Metrics", variable=self.metrics_var, command=self.toggle_metrics)
+        profilemenu = tk.Menu(settingsmenu, tearoff=0)
+        self.profile_var = tk.StringVar(value=self.settings.ocr_profile)
+        for profile, label in OCR_PROFILES.items():
+            profilemenu.add_radiobutton(label=label, value=profile, variable=self.profile_var, command=self.set_ocr_profile)
+        settingsmenu.add_cascade(label="OCR Profile", menu=profilemenu)
+        self.refine_var = tk.BooleanVar(value=self.settings.ocr_refine)
+        settingsmenu.add_checkbutton(label="Re-read Doubtful Text", variable=self.refine_var, command=self.toggle_refine)
+        self.live_var = tk.BooleanVar(value=False)
+        settingsmenu.add_checkbutton(label="Live Screen Capture", variable=self.live_var, command=self.toggle_live_capture)
         menubar.add_cascade(label="File", menu=filemenu)
         menubar.add_cascade(label="Settings", menu=settingsmenu)
         self.root.config(menu=menubar)
@@ -139,6 +234,9 @@ class ScreenshotIngestorApp:
         self.progress_bar.pack(side=tk.BOTTOM, pady=5)
 
     def set_status(self, state: AppState, message: str = None):
+        if threading.current_thread() is not threading.main_thread():
+            self.post(None, "status", state, message)
+            return
         status_text = f"{state.value}" + (f" - {message}" if message else "")
         self.status_label.config(text=status_text)
         colors = {
@@ -155,11 +253,207 @@ class ScreenshotIngestorApp:
         self.root.update_idletasks()
         logging.info(f"Status updated to: {status_text}")
 
+    def post(self, run_id: Optional[int], kind: str, *args):
+        """Queues a UI update from any thread; updates tagged with an old run_id are dropped."""
+        self.ui_queue.put((run_id, kind, args))
+
+    def drain_ui_queue(self):
+        """Applies queued updates on the Tk thread, rendering each poll's prices in one insert."""
+        status = None
+        prices = []
+        try:
+            for _ in range(Config.UI_MAX_UPDATES_PER_POLL):
+                run_id, kind, args = self.ui_queue.get_nowait()
+                if run_id is not None and run_id != self.run_id:
+                    continue
+                if kind == "status":
+                    status = args
+                elif kind == "lines":
+                    self.extracted_text_box.delete("1.0", tk.END)
+                    self.extracted_text_box.insert(tk.END, "".join(line + "\n" for line in args[0]))
+                elif kind == "price":
+                    prices.append(self.price_text(*args))
+                elif kind == "done":
+                    prices.clear()
+                    self.show_prices(*args)
+                elif kind == "finished":
+                    self.progress_bar.stop()
+        except queue.Empty:
+            pass
+        if prices:
+            self.tarkov_results_text.config(state=tk.NORMAL)
+            self.tarkov_results_text.insert(tk.END, "".join(prices))
+            self.tarkov_results_text.config(state=tk.DISABLED)
+            if not self.run_first_shown:
+                self.run_first_shown = True
+                metrics.observe("ui.first_price", time.perf_counter() - self.run_started)
+        if status is not None:
+            self.set_status(*status)
+        self.root.after(Config.UI_POLL_INTERVAL_MS, self.drain_ui_queue)
+
     def toggle_gpu(self):
         self.settings.ocr_use_gpu = self.gpu_var.get()
-        self.ocr = OCRProcessor(self.settings.ocr_use_gpu)
+        self.ocr.reconfigure(self.settings.ocr_use_gpu)
+        self.settings.save_settings()
+        self.set_status(AppState.READY, f"OCR GPU set to: {self.settings.ocr_use_gpu} (switching in the background)")
+
+    def set_ocr_profile(self):
+        self.settings.ocr_profile = self.profile_var.get()
+        self.ocr.reconfigure(self.settings.ocr_use_gpu, self.settings.ocr_profile)
+        self.settings.save_settings()
+        self.set_status(AppState.READY, f"OCR profile set to: {OCR_PROFILES[self.settings.ocr_profile]} "
+                                        "(switching in the background)")
+
+    def toggle_refine(self):
+        self.settings.ocr_refine = self.refine_var.get()
+        self.settings.save_settings()
+        if self.live is not None:
+            self.live.refine = self.settings.ocr_refine
+        self.set_status(AppState.READY, f"Re-reading doubtful text set to: {self.settings.ocr_refine}")
+
+    def after_data_ready(self, callback):
+        """Runs callback on the Tk thread once warm-up is done, polling instead of blocking the window."""
+        if not self.data_ready.is_set():
+            self.root.after(100, self.after_data_ready, callback)
+            return
+        callback()
+
+    def toggle_snapshot(self):
+        if not self.data_ready.is_set():
+            self.set_status(AppState.WARMING_UP, "Offline price snapshot will switch once item data is loaded...")
+        self.after_data_ready(self.apply_snapshot)
+
+    def apply_snapshot(self):
+        if self.api is None:
+            self.set_status(AppState.ERROR, "Failed to load item data; see the log.")
+            return
+        self.settings.use_price_snapshot = self.snapshot_var.get()
+        if self.settings.use_price_snapshot:
+            self.api.enable_snapshot()
+        else:
+            self.api.disable_snapshot()
+        self.settings.save_settings()
+        self.set_status(AppState.READY, f"Offline price snapshot set to: {self.settings.use_price_snapshot}")
+
+    def toggle_grid_mode(self):
+        self.settings.ocr_grid_mode = self.grid_var.get()
+        self.settings.save_settings()
+        self.set_status(AppState.READY, f"Stash grid mode set to: {self.settings.ocr_grid_mode}")
+
+    def toggle_history(self):
+        if not self.data_ready.is_set():
+            self.set_status(AppState.WARMING_UP, "Price history will switch once item data is loaded...")
+        self.after_data_ready(self.apply_history)
+
+    def apply_history(self):
+        self.settings.history_enabled = self.history_var.get()
+        if self.settings.history_enabled and self.history is None:
+            from history import HistoryStore
+            self.history = HistoryStore(kind="gui")
+        elif not self.settings.history_enabled and self.history is not None:
+            self.history.close()
+            self.history = None
+        self.settings.save_settings()
+        self.set_status(AppState.READY, f"Price history recording set to: {self.settings.history_enabled}")
+
+    def toggle_metrics(self):
+        self.settings.metrics_enabled = metrics.enabled = self.metrics_var.get()
         self.settings.save_settings()
-        self.set_status(AppState.READY, f"OCR GPU set to: {self.settings.ocr_use_gpu}")
+        self.set_status(AppState.READY, f"Performance metrics set to: {metrics.enabled}")
+
+    def export_metrics(self):
+        filename = filedialog.asksaveasfilename(defaultextension=".json", initialfile="metrics.json",
+                                                filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom"), ("All files", "*.*")])
+        if not filename:
+            return
+        try:
+            metrics.export(filename)
+            self.set_status(AppState.COMPLETED, f"Metrics exported to {filename}")
+        except OSError as e:
+            self.set_status(AppState.ERROR, f"Error exporting metrics: {e}")
+
+    def toggle_live_capture(self):
+        if not self.live_var.get():
+            if self.live is not None:
+                self.live.stop()
+                self.live = None
+                self.set_status(AppState.READY, "Live capture stopped.")
+            return
+        if not self.data_ready.is_set():
+            self.set_status(AppState.WARMING_UP, "Live capture will start once item data is loaded...")
+        self.after_data_ready(self.start_live_capture)
+
+    def ask_capture_region(self) -> Optional[dict]:
+        """The saved capture region, asking for one when none is set or it overlaps this window."""
+        from capture import parse_region
+        text = self.settings.capture_region
+        while True:
+            if not text:
+                text = simpledialog.askstring("Live Screen Capture", "Screen region to capture, as "
+                                              "left,top,width,height (e.g. the game's stash):", parent=self.root)
+                if not text:
+                    return None
+            try:
+                region = parse_region(text)
+            except ValueError as e:
+                messagebox.showerror("Live Screen Capture", f"Invalid region: {e}")
+                text = ""
+                continue
+            x, y = self.root.winfo_rootx(), self.root.winfo_rooty()
+            width, height = self.root.winfo_width(), self.root.winfo_height()
+            if region["left"] < x + width and x < region["left"] + region["width"] \
+                    and region["top"] < y + height and y < region["top"] + region["height"]:
+                # Capturing our own results panel would feed them back into OCR.
+                messagebox.showerror("Live Screen Capture", "The region overlaps this window. "
+                                     "Choose a region outside it, or move the window.")
+                text = ""
+                continue
+            if text != self.settings.capture_region:
+                self.settings.capture_region = text
+                self.settings.save_settings()
+            return region
+
+    def start_live_capture(self):
+        if self.live is not None or not self.live_var.get():
+            return
+        region = self.ask_capture_region()
+        if region is None:
+            self.live_var.set(False)
+            self.set_status(AppState.READY, "Live capture needs a screen region.")
+            return
+        try:
+            from capture import LiveCapture
+            self.live = LiveCapture(self.ocr, self.corrector, self.api, region, self.settings.capture_fps,
+                                    on_update=self.on_live_update, refine=self.settings.ocr_refine).start()
+        except Exception as e:
+            self.live_var.set(False)
+            self.set_status(AppState.ERROR, f"Could not start live capture: {e}")
+            return
+        self.live_shown = None
+        self.image_display.clear()
+        self.set_status(AppState.PROCESSING, "Live capture running...")
+        self.root.after(250, self.poll_live)
+
+    def on_live_update(self, update: dict):
+        """Called on the capture thread; the Tk loop picks the latest update up in poll_live()."""
+        with self.live_lock:
+            self.live_update = update
+
+    def poll_live(self):
+        if self.live is None:
+            return
+        with self.live_lock:
+            update, self.live_update = self.live_update, None
+        if update is not None:
+            shown = (update["lines"], update["counts"])
+            if shown != self.live_shown:
+                self.live_shown = shown
+                self.extracted_text_box.delete("1.0", tk.END)
+                self.extracted_text_box.insert(tk.END, "".join(line + "\n" for line in update["lines"]))
+                self.show_prices(update["counts"], update["items_data"])
+            self.set_status(AppState.PROCESSING, f"Live: {update['changed']}/{update['tiles']} "
+                            f"{'grid cells' if update['grid'] else 'tiles'} changed, {update['seconds'] * 1000:.0f} ms")
+        self.root.after(250, self.poll_live)
 
     def copy_results(self):
         results = self.tarkov_results_text.get("1.0", tk.END).strip()
@@ -190,88 +484,142 @@ class ScreenshotIngestorApp:
     def load_image(self):
         filename = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg;*.gif;*.bmp;*.webp"), ("All files", "*.*")])
         if filename:
+            start = time.perf_counter()
             self.image_display.load_and_process_image(filename, filename=filename)
+            self.image_source = filename
+            self.load_seconds = time.perf_counter() - start
             self.extract_text()
 
     def paste_from_clipboard(self):
         clipboard_content = ImageGrab.grabclipboard()
         if isinstance(clipboard_content, Image.Image):
+            start = time.perf_counter()
             self.image_display.load_and_process_image(clipboard_content)
+            self.image_source = "clipboard"
+            self.load_seconds = time.perf_counter() - start
             self.extract_text()
 
     def extract_text(self):
-        if not self.image_display.img:
+        """Starts a new run for the loaded image, superseding any run still in flight."""
+        if self.image_display.pixels is None:
             self.set_status(AppState.READY, "No image loaded.")
             return
-        self.set_status(AppState.PROCESSING, "Extracting text...")
-        self.progress_bar.start()
-
-        def do_ocr():
-            try:
-                results = self.ocr.extract_text(self.image_display.img)
-                extracted_text = ""
-                corrected_lines = []
-                for (_, text, _) in results:
-                    preprocessed = preprocess_search_term(text)
-                    corrected = self.autocorrect_term(preprocessed)
-                    corrected_lines.append(corrected)
-                    extracted_text += corrected + "\n"
-                self.extracted_text_box.delete("1.0", tk.END)
-                self.extracted_text_box.insert(tk.END, extracted_text)
-                self.set_status(AppState.COMPLETED, "Text extracted successfully!")
-                self.search_tarkov_dev(corrected_lines)
-            except Exception as e:
-                self.set_status(AppState.ERROR, f"Error during OCR: {e}")
-            finally:
-                self.progress_bar.stop()
-
-        threading.Thread(target=do_ocr, daemon=True).start()
-
-    def autocorrect_term(self, term: str) -> str:
-        term_lower = term.lower()
-        if term_lower in self.autocorrect_rules:
-            return self.autocorrect_rules[term_lower]
-        if self.settings.use_item_corrections and self.item_name_lookup:
-            best_match, score = process.extractOne(term_lower, self.item_name_lookup.keys())
-            if score >= Config.FUZZY_MATCH_THRESHOLD:
-                return best_match
-        return term
-
-    def search_tarkov_dev(self, item_names: list):
-        self.set_status(AppState.SEARCHING, "Searching Tarkov.dev...")
-        self.progress_bar.start()
+        if self.ocr_future is not None:
+            # The worker skips the previous image if it has not started on it; otherwise its result is dropped.
+            self.ocr_future.cancel()
+        self.run_id += 1
+        self.run_started = time.perf_counter()
+        self.run_first_shown = False
+        self.extracted_text_box.delete("1.0", tk.END)
         self.tarkov_results_text.config(state=tk.NORMAL)
         self.tarkov_results_text.delete("1.0", tk.END)
+        self.tarkov_results_text.config(state=tk.DISABLED)
+        self.set_status(AppState.PROCESSING, "Extracting text...")
+        self.progress_bar.start()
 
-        item_counts = {}
-        for item_name in item_names:
-            corrected = self.autocorrect_term(preprocess_search_term(item_name))
-            item_counts[corrected] = item_counts.get(corrected, 0) + 1
+        breakdown = RunBreakdown()
+        if self.load_seconds is not None:
+            breakdown.add("decode", self.load_seconds)
+            self.load_seconds = None
+        try:
+            self.ocr_future = self.ocr.submit(self.image_display.pixels, self.settings.ocr_grid_mode,
+                                              refine=self.settings.ocr_refine)
+        except RuntimeError as e:
+            self.progress_bar.stop()
+            self.set_status(AppState.ERROR, f"Error during OCR: {e}")
+            return
+        threading.Thread(target=self.run_pipeline, args=(self.run_id, self.ocr_future, breakdown,
+                                                         self.image_display.pixels, self.image_source),
+                         daemon=True).start()
 
+    def run_pipeline(self, run_id: int, future, breakdown: RunBreakdown, pixels=None, source: Optional[str] = None):
+        """Waits for OCR, then corrects and prices on a worker thread, posting each result as it is ready."""
+        try:
+            if not (self.ocr.ready and self.data_ready.is_set()):
+                self.post(run_id, "status", AppState.WARMING_UP, "Waiting for OCR models and item data...")
+            results = future.result()
+            breakdown.add("ocr", future.ocr_seconds or 0.0)
+            for stage in ("detect", "recognize"):
+                if stage in future.timings:
+                    breakdown.add(stage, future.timings[stage])
+            self.data_ready.wait()
+            if run_id != self.run_id:
+                return
+            start = time.perf_counter()
+            with metrics.span("ui.autocorrect_term"):
+                corrected_lines, item_counts = self.corrector.correct_results(results)
+            item_cells = {name: self.corrector.cell_labels(cells)
+                          for name, cells in self.corrector.item_cells(results, corrected_lines).items()}
+            breakdown.add("correct", time.perf_counter() - start)
+            self.post(run_id, "lines", corrected_lines)
+            self.post(run_id, "status", AppState.SEARCHING, "Searching Tarkov.dev...")
+
+            names = {item_name.strip(): (item_name, count) for item_name, count in item_counts.items()}
+
+            def on_item(name: str, item_data):
+                if name in names and run_id == self.run_id:
+                    item_name, count = names[name]
+                    self.post(run_id, "price", item_name, count, item_data, item_cells.get(item_name))
+
+            start = time.perf_counter()
+            items_data = self.api.get_items_data(item_counts.keys(), on_item)
+            breakdown.add("prices", time.perf_counter() - start)
+            logging.info(f"Price cache stats: {self.api.cache_stats()}")
+            metrics.observe("run.total", sum(seconds for stage, seconds in breakdown.stages
+                                             if stage not in ("detect", "recognize")))
+            self.post(run_id, "done", item_counts, items_data, item_cells)
+            self.post(run_id, "status", AppState.COMPLETED, f"Search completed. {breakdown.summary()}")
+            history = self.history
+            if history is not None and pixels is not None:
+                history.record(pixel_hash(pixels), source, item_counts, items_data, dict(breakdown.stages))
+        except CancelledError:
+            pass
+        except Exception as e:
+            self.post(run_id, "status", AppState.ERROR, f"Error during OCR: {e}")
+        finally:
+            self.post(run_id, "finished")
+
+    @staticmethod
+    def price_text(item_name: str, count: int, item_data: Optional[list], cells: Optional[str] = None) -> str:
+        """cells, in grid mode, is where the item sits, as TermCorrector.cell_labels() formats it."""
+        where = f" at {cells}" if cells else ""
+        if not item_data:
+            return f"Item: {item_name} (x{count}){where} - No data found\n"
+        return f"Item: {item_name} (x{count}){where}\n" + "".join(
+            f"  Name: {item['name']}\n  Avg Price: {item['avg24hPrice']}\n" for item in item_data)
+
+    def show_prices(self, item_counts: dict, items_data: dict, item_cells: Optional[dict] = None):
+        """Renders the final price list in item order, replacing whatever was streamed in."""
+        text = []
         for item_name, count in item_counts.items():
-            item_data = self.api.get_item_data(item_name)
-            if item_data:
-                self.tarkov_results_text.insert(tk.END, f"Item: {item_name} (x{count})\n")
-                for item in item_data:
-                    self.tarkov_results_text.insert(tk.END, f"  Name: {item['name']}\n  Avg Price: {item['avg24hPrice']}\n")
-            else:
-                self.tarkov_results_text.insert(tk.END, f"Item: {item_name} (x{count}) - No data found\n")
+            item_data = items_data.get(item_name.strip())
+            if not item_data:
                 logging.warning(f"No API data found for item: {item_name}")
-
+            text.append(self.price_text(item_name, count, item_data, (item_cells or {}).get(item_name)))
+        self.tarkov_results_text.config(state=tk.NORMAL)
+        self.tarkov_results_text.delete("1.0", tk.END)
+        self.tarkov_results_text.insert(tk.END, "".join(text))
         self.tarkov_results_text.config(state=tk.DISABLED)
-        self.set_status(AppState.COMPLETED, "Search completed.")
-        self.progress_bar.stop()
 
     def clear_all(self):
+        self.run_id += 1  # Drops whatever the current run still posts
+        self.progress_bar.stop()
         self.image_display.clear()
         self.extracted_text_box.delete("1.0", tk.END)
+        self.tarkov_results_text.config(state=tk.NORMAL)
         self.tarkov_results_text.delete("1.0", tk.END)
+        self.tarkov_results_text.config(state=tk.DISABLED)
         self.set_status(AppState.READY)
 
     def on_closing(self):
         self.settings.save_settings()
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
+            if self.live is not None:
+                self.live.stop()
             self.root.destroy()
+            self.ocr.shutdown()
+            if self.history is not None:
+                self.history.close()
             logging.info("Application closed.")
 
     def run(self):
@@ -1,7 +1,12 @@
 # utils.py
+import hashlib
 import os
 import sys
+import sqlite3
 import logging
+from typing import Union
+import numpy as np
+from PIL import Image
 
 def resource_path(relative_path: str) -> str:
     """Get absolute path to resource, works for dev and for PyInstaller."""
@@ -20,4 +25,38 @@ def preprocess_search_term(term: str) -> str:
     term = term.strip()
     # Keep alphanumeric, spaces, and some punctuation (e.g., hyphens)
     term = ''.join(c for c in term if c.isalnum() or c in " -")
-    return term  # Don't lowsercase here; let autocorrect_term handle case
\ No newline at end of file
+    return term  # Don't lowsercase here; let TermCorrector handle case
+
+def normalize_term(term: str) -> str:
+    """Normalizes a term for matching: preprocessed, lowercased, single-spaced."""
+    return ' '.join(preprocess_search_term(term).lower().split())
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """Opens a SQLite database shared between threads, in WAL mode, creating its folder if needed."""
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def hash_file(path: str) -> str:
+    """Hashes a file's contents, so renamed or re-saved copies of a screenshot are recognised."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def to_pixels(image: Union[str, Image.Image, np.ndarray]) -> np.ndarray:
+    """Returns an image as an RGB uint8 array, decoding files and converting PIL images.
+
+    RGB images are exposed without an intermediate convert() copy, so a decoded
+    image costs one full-resolution buffer on top of PIL's own.
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, str):
+        with Image.open(image) as img:
+            return to_pixels(img)
+    return np.asarray(image if image.mode == "RGB" else image.convert("RGB"))
@@ -0,0 +1,234 @@
+# watcher.py
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from settings import AppSettings, Config
+from utils import resource_path, connect_sqlite, hash_file
+from api import TarkovAPI
+from ocr_service import OCRService
+from history import HistoryStore
+import batch
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+class ProcessedStore:
+    """Persists which contents have been processed, and the last seen size/mtime of every file."""
+
+    def __init__(self, path: str = Config.WATCH_STATE_FILE):
+        self.lock = threading.Lock()
+        self.conn = connect_sqlite(resource_path(path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS processed (hash TEXT PRIMARY KEY, path TEXT, processed_at REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT)")
+
+    def is_handled(self, path: str, size: int, mtime: float) -> bool:
+        """True if the file is unchanged since it was hashed and its contents were processed."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM files JOIN processed ON processed.hash = files.hash "
+                "WHERE files.path = ? AND files.size = ? AND files.mtime = ?", (path, size, mtime)).fetchone()
+        return row is not None
+
+    def is_processed(self, content_hash: str) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM processed WHERE hash = ?", (content_hash,)).fetchone() is not None
+
+    def remember_file(self, path: str, size: int, mtime: float, content_hash: str):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                              (path, size, mtime, content_hash))
+
+    def mark_processed(self, content_hash: str, path: str):
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO processed (hash, path, processed_at) VALUES (?, ?, ?)",
+                              (content_hash, path, time.time()))
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, daemon: "WatchDaemon"):
+        super().__init__()
+        self.daemon = daemon
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.daemon.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.daemon.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.daemon.notify(event.dest_path)
+
+class WatchDaemon:
+    """Watches a folder and prices every new screenshot exactly once.
+
+    File events come from watchdog (inotify on Linux) when it is installed, otherwise
+    from polling. A file is only picked up once its size and mtime have been stable for
+    Config.WATCH_DEBOUNCE seconds. New contents go through a bounded queue to a single
+    OCR worker, so discovery stalls instead of buffering when OCR falls behind.
+    """
+
+    def __init__(self, directory: str, output: str = "-", fmt: str = "jsonl", use_gpu: Optional[bool] = None,
+                 state_file: str = Config.WATCH_STATE_FILE):
+        self.directory = os.path.abspath(directory)
+        self.output = output
+        self.fmt = fmt
+        self.settings = AppSettings()
+        self.use_gpu = self.settings.ocr_use_gpu if use_gpu is None else use_gpu
+        self.state = ProcessedStore(state_file)
+        self.history = HistoryStore(kind="watch") if self.settings.history_enabled else None
+        self.api = TarkovAPI()
+        if self.settings.use_price_snapshot:
+            self.api.enable_snapshot()
+        self.queue: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=Config.WATCH_QUEUE_SIZE)
+        self.candidates: Dict[str, Optional[Tuple[int, float, float]]] = {}
+        self.candidates_lock = threading.Lock()
+        self.in_flight = set()
+        self.seen: Dict[str, Tuple[int, float]] = {}
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.worker: Optional[threading.Thread] = None
+
+    def notify(self, path: str):
+        """Registers a created or modified file; it is handled once it stops changing."""
+        if path.lower().endswith(batch.IMAGE_EXTENSIONS):
+            with self.candidates_lock:
+                self.candidates.setdefault(path, None)
+
+    def scan(self):
+        """Registers every image that is new or changed since it was last hashed, in this run or a previous one."""
+        for path in batch.find_images(self.directory):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if self.seen.get(path) != (st.st_size, st.st_mtime) and not self.state.is_handled(path, st.st_size, st.st_mtime):
+                self.notify(path)
+
+    def _ready_paths(self) -> list:
+        """Returns the candidates whose size and mtime have not changed for the debounce period."""
+        now = time.time()
+        ready = []
+        with self.candidates_lock:
+            for path, seen in list(self.candidates.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del self.candidates[path]
+                    continue
+                if seen is None or seen[:2] != (st.st_size, st.st_mtime):
+                    self.candidates[path] = (st.st_size, st.st_mtime, now)
+                elif now - seen[2] >= Config.WATCH_DEBOUNCE and st.st_size > 0:
+                    del self.candidates[path]
+                    ready.append((path, st.st_size, st.st_mtime))
+        return ready
+
+    def _enqueue(self, path: str, size: int, mtime: float):
+        try:
+            content_hash = hash_file(path)
+        except OSError as e:
+            logging.warning(f"Could not read {path}: {e}")
+            return
+        self.state.remember_file(path, size, mtime, content_hash)
+        self.seen[path] = (size, mtime)
+        if content_hash in self.in_flight or self.state.is_processed(content_hash):
+            self.duplicates += 1
+            logging.info(f"Skipping duplicate screenshot {path}")
+            return
+        self.in_flight.add(content_hash)
+        while not self.stop_event.is_set():
+            if self.worker is not None and not self.worker.is_alive():
+                logging.error(f"OCR worker thread has stopped; not queueing {path}")
+                self.in_flight.discard(content_hash)
+                self.stop_event.set()
+                return
+            try:
+                self.queue.put((path, content_hash), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _worker(self, writer: batch.RowWriter, service: OCRService):
+        corrector = batch.make_corrector(self.settings.use_item_corrections)
+        while not self.stop_event.is_set():
+            try:
+                path, content_hash = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                future = service.submit(path, self.settings.ocr_grid_mode, refine=self.settings.ocr_refine)
+                result = batch.correct_ocr_result(path, future, corrector)
+                if result["error"] is not None:
+                    raise RuntimeError(result["error"])
+                items_data = self.api.get_items_data(result["counts"].keys()) if result["counts"] else {}
+                writer.write(batch.result_rows(result, items_data))
+                if self.history is not None:
+                    self.history.record(content_hash, path, result["counts"], items_data, result["timings"])
+                self.state.mark_processed(content_hash, path)
+                self.processed += 1
+            except Exception as e:
+                # Not marked processed and forgotten as seen, so the next scan or run picks the file up again.
+                logging.error(f"Error processing {path}: {e}", exc_info=True)
+                self.errors += 1
+                self.seen.pop(path, None)
+            finally:
+                self.in_flight.discard(content_hash)
+                self.queue.task_done()
+
+    def run(self):
+        """Watches until interrupted."""
+        stream = sys.stdout if self.output == "-" else open(self.output, "a", newline="", encoding="utf-8")
+        writer = batch.RowWriter(stream, self.fmt, header=stream is sys.stdout or stream.tell() == 0)
+        service = OCRService.from_settings(self.settings, self.use_gpu).start()
+        worker = self.worker = threading.Thread(target=self._worker, args=(writer, service), daemon=True)
+        worker.start()
+
+        observer = None
+        if Observer is not None:
+            observer = Observer()
+            observer.schedule(_EventHandler(self), self.directory, recursive=True)
+            observer.start()
+            logging.info(f"Watching {self.directory} for file events")
+        else:
+            logging.info(f"watchdog not installed; polling {self.directory} every {Config.WATCH_POLL_INTERVAL}s")
+        print(f"Watching {self.directory} (Ctrl+C to stop)", file=sys.stderr)
+
+        self.scan()
+        last_scan = time.time()
+        try:
+            while not self.stop_event.is_set():
+                if observer is None and time.time() - last_scan >= Config.WATCH_POLL_INTERVAL:
+                    self.scan()
+                    last_scan = time.time()
+                for path, size, mtime in self._ready_paths():
+                    self._enqueue(path, size, mtime)
+                time.sleep(min(0.25, Config.WATCH_DEBOUNCE))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            worker.join(timeout=5)
+            service.shutdown()
+            if self.history is not None:
+                self.history.close()
+            if stream is not sys.stdout:
+                stream.close()
+            print(f"Processed {self.processed} screenshots, skipped {self.duplicates} duplicates, "
+                  f"{self.errors} errors", file=sys.stderr)
+
+    def stop(self):
+        self.stop_event.set()